@@ -19,20 +19,40 @@ async def initialise():
 
     # Initialise all services
     logger.info("Initialising services...")
+    from app_v1.initialisers.metrics import initialiseMetrics
     from app_v1.initialisers.ollama import initialiseOllama
     from app_v1.initialisers.openai_client import initialiseOpenAI
+    from app_v1.initialisers.embedding_service import initialiseEmbeddingService
     from app_v1.initialisers.s3 import initialiseS3
     from app_v1.initialisers.cognito import initialiseCognito
     from app_v1.initialisers.gemini import initialiseGemini
     from app_v1.initialisers.postgresql import initialisePostgreSQL
+    from app_v1.initialisers.rate_limiter import initialiseRateLimiter
+    from app_v1.initialisers.resume_cache import initialiseResumeCache
+    from app_v1.initialisers.job_listing_extractor import initialiseJobListingExtractor
+    from app_v1.initialisers.job_listing_cache import initialiseJobListingCache
+    from app_v1.initialisers.executors import initialiseExecutors
+    from app_v1.initialisers.pdf_text import initialisePdfText
+    from app_v1.initialisers.job_status import initialiseJobStatus
+    from app_v1.initialisers.job_worker import initialiseJobWorker
 
     for initialiser in [
+        initialiseMetrics,
         initialiseOllama,
         initialiseOpenAI,
+        initialiseEmbeddingService,
         initialiseS3,
         initialiseCognito,
         initialiseGemini,
-        initialisePostgreSQL
+        initialisePostgreSQL,
+        initialiseRateLimiter,
+        initialiseResumeCache,
+        initialiseJobListingExtractor,
+        initialiseJobListingCache,
+        initialiseExecutors,
+        initialisePdfText,
+        initialiseJobStatus,
+        initialiseJobWorker
     ]:
         if not initialiser(app):
             raise Exception("Failed to initialize all services, check logs for details.")
@@ -49,6 +69,7 @@ async def initialise():
     from app_v1.routers.user.confirm import router as user_confirm_router
     from app_v1.routers.user.change_subscription import router as user_change_subscription_router
     from app_v1.routers.user.subscription import router as user_subscription_router
+    from app_v1.routers.metrics.scrape import router as metrics_scrape_router
 
     for router in [
         cover_letter_result_router,
@@ -60,14 +81,11 @@ async def initialise():
         user_register_router,
         user_confirm_router,
         user_change_subscription_router,
-        user_subscription_router
+        user_subscription_router,
+        metrics_scrape_router
     ]:
         app.include_router(router)
 
-    logger.info("Setting up app.state...")
-    app.state.index_jobs = {}
-    app.state.cover_letter_jobs = {}
-
     logger.info("Startup complete.")
 
 @app.on_event("shutdown")
@@ -75,9 +93,25 @@ async def shutdown():
     logger.info("Shutting down app...")
 
     # Shutdown all services
+    from app_v1.shutdown.job_worker import shutdownJobWorker
+    from app_v1.shutdown.job_status import shutdownJobStatus
+    from app_v1.shutdown.embedding_service import shutdownEmbeddingService
+    from app_v1.shutdown.pdf_renderer import shutdownPdfRenderer
+    from app_v1.shutdown.executors import shutdownExecutors
+    from app_v1.shutdown.pdf_text import shutdownPdfText
+    from app_v1.shutdown.job_listing_cache import shutdownJobListingCache
+    from app_v1.shutdown.gemini import shutdownGemini
     from app_v1.shutdown.postgresql import shutdownPostgreSQL
 
     for shutdown in [
+        shutdownJobWorker,
+        shutdownJobStatus,
+        shutdownEmbeddingService,
+        shutdownPdfRenderer,
+        shutdownExecutors,
+        shutdownPdfText,
+        shutdownJobListingCache,
+        shutdownGemini,
         shutdownPostgreSQL
     ]:
         if not shutdown(app):
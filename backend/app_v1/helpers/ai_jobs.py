@@ -1,27 +1,32 @@
-import psycopg2, logging, os
+import psycopg2, psycopg2.extras, logging, os, time
 from datetime import datetime
+from app_v1.helpers.postgresql_pool import getConnection
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Attempts at writing a job's completion, and the base of the exponential delay between them in seconds.
+JOB_COMPLETE_ATTEMPTS = int(os.getenv("JOB_COMPLETE_ATTEMPTS", "5"))
+JOB_COMPLETE_RETRY_DELAY = float(os.getenv("JOB_COMPLETE_RETRY_DELAY", "0.5"))
+
 def checkAIJobsTableExists(app):
     # This function checks if the 'aijobs' table exists in the PostgreSQL database.
     logger.info("Checking AI Jobs Table...")
     try:
-        # It uses a cursor to execute a SQL query that checks for the existence of the table.
-        cur = app.state.postgresql_db.cursor()
-        check_table_query = """
-            SELECT EXISTS (
-                SELECT 1
-                FROM   pg_tables
-                WHERE  schemaname = 'public'
-                AND    tablename = 'aijobs'
-            );
-            """
-        cur.execute(check_table_query)
-        
-        result = cur.fetchone()
+        # It checks out a pooled connection and uses a cursor to execute a SQL query that checks for the existence of the table.
+        with getConnection(app) as conn, conn.cursor() as cur:
+            check_table_query = """
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM   pg_tables
+                    WHERE  schemaname = 'public'
+                    AND    tablename = 'aijobs'
+                );
+                """
+            cur.execute(check_table_query)
+            
+            result = cur.fetchone()
         logger.debug(f"Query Result: {result}")
         
         # If the table does not exist, it logs an error and returns False.
@@ -35,12 +40,9 @@ def checkAIJobsTableExists(app):
             logger.info("AI Jobs Table doesn't exist")
             return False
     except Exception as e:
-        # If there is an exception during the process, it rolls back any changes and logs the error before returning False.
-        app.state.postgresql_db.rollback()
+        # If there is an exception during the process, the connection is rolled back and the error is logged before returning False.
         logger.error(f"Error checking AI Jobs Table: {e}")
         return False
-    finally:
-        cur.close()
 
     # If the table exists, it logs a success message and returns True.
     logger.info("AI Jobs Table does exist")
@@ -50,42 +52,52 @@ def createDefaultAIJobsTable(app):
     # This function creates a default 'AIJobs' table in the PostgreSQL database if it does not already exist.
     logger.info("Creating AI Jobs Table...")
     try:
-        # Attempts to create a cursor object from the PostgreSQL database connection stored in the app's state.
-        cur = app.state.postgresql_db.cursor()
-        
-        create_table_query = """
-            CREATE TABLE AIJobs (
-                JobID UUID PRIMARY KEY,
-                CreatedBy UUID,
-                JobType VARCHAR(20) CHECK (JobType IN ('IndexResume', 'GenerateCoverletter')),
-                Status VARCHAR(500),
-                Created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                Finished TIMESTAMP
-            );
-        """
-        
-        # Executes the SQL query to create the table using the cursor.
-        cur.execute(create_table_query)
-        
-        # Commits the transaction to save changes to the database if the table creation is successful.
-        app.state.postgresql_db.commit()
+        # Checks out a pooled connection and creates a cursor object from it.
+        with getConnection(app) as conn, conn.cursor() as cur:
+            create_table_query = """
+                CREATE TABLE AIJobs (
+                    JobID UUID PRIMARY KEY,
+                    CreatedBy UUID,
+                    JobType VARCHAR(20) CHECK (JobType IN ('IndexResume', 'GenerateCoverletter')),
+                    Status VARCHAR(500),
+                    Created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    Finished TIMESTAMP
+                );
+            """
+            
+            # Executes the SQL query to create the table using the cursor.
+            cur.execute(create_table_query)
+            
+            # Commits the transaction to save changes to the database if the table creation is successful.
+            conn.commit()
         
         logger.info("Created Default AI Jobs Table successfully")
     except psycopg2.errors.DuplicateTable as e:
-        # Catches a specific exception for duplicate table errors and rolls back the transaction.
-        app.state.postgresql_db.rollback()
+        # Catches a specific exception for duplicate table errors, the transaction has already been rolled back.
         logger.warning(f"Table 'AIJobs' already exists: {e}")
     except Exception as e:
         # Catches any other exceptions that may occur during the table creation process.
-        app.state.postgresql_db.rollback()
         logger.error(f"An error occurred when creating AI Jobs Table: {e}")
         return False
-    finally:
-        cur.close()
     
     # Returns True to indicate that the table creation was successful.
     return True
 
+def createAIJobsIndexes(app):
+    # This function creates the indexes used to look up a user's recent jobs, it is safe to run on every startup.
+    logger.info("Creating AI Jobs Indexes...")
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS AIJobs_CreatedBy_Created_idx
+                ON AIJobs (CreatedBy, Created);
+            """)
+            conn.commit()
+    except Exception as e:
+        logger.error(f"An error occurred when creating AI Jobs Indexes: {e}")
+        return False
+    return True
+
 def initialiseAIJobsTable(app):
     # This function initializes the 'AIJobs' table in the PostgreSQL database.
     logger.info("Initialising AI Jobs Table...")
@@ -97,6 +109,7 @@ def initialiseAIJobsTable(app):
             createDefaultAIJobsTable(app)
         else:
             logger.info("AIJobs table already exists. Skipping creation.")
+        createAIJobsIndexes(app)
     except Exception as e:
         # Logs an error message indicating that the initialization of the AI Jobs Table failed.
         logger.error("Failed to initialise AI Jobs Table")
@@ -110,39 +123,33 @@ def createJob(app, job_uuid, user_uuid, job_type, status):
     
     try:
         # Inserts a new AI job record into the PostgreSQL database with the provided details and commits the transaction.
-        cur = app.state.postgresql_db.cursor()
-        
-        query = """
-            INSERT INTO AIJobs (JobID, CreatedBy, JobType, Status, Created)
-            VALUES (%s, %s, %s, %s, %s);
-        """
-        
-        created_at = datetime.utcnow()
-        
-        cur.execute(query, (
-            job_uuid,
-            user_uuid,
-            job_type,
-            status,
-            created_at
-        ))
-        
-        app.state.postgresql_db.commit()
+        with getConnection(app) as conn, conn.cursor() as cur:
+            query = """
+                INSERT INTO AIJobs (JobID, CreatedBy, JobType, Status, Created)
+                VALUES (%s, %s, %s, %s, %s);
+            """
+            
+            created_at = datetime.utcnow()
+            
+            cur.execute(query, (
+                job_uuid,
+                user_uuid,
+                job_type,
+                status,
+                created_at
+            ))
+            
+            conn.commit()
         
         logger.info(f"AI job created successfully for Job UUID: {job_uuid} and User UUID: {user_uuid}")
         return True
     
     except psycopg2.DatabaseError as e:
-        app.state.postgresql_db.rollback()
         logger.error(f"Database error while creating AI job: {e}")
     
     except Exception as e:
         # Catches and handles any other unexpected exceptions that may occur.
         logger.error(f"An unexpected error occurred while creating AI job: {e}")
-    
-    finally:
-        # Ensures that the cursor is closed regardless of whether an exception was raised or not.
-        cur.close()
 
     # Returns False to indicate that the job creation failed due to an error.
     return False
@@ -153,14 +160,15 @@ def getJob(app, job_uuid, user_uuid):
     result = {}
     try:
         # Tries to execute the following block of code which involves interacting with the database to retrieve job details.
-        cur = app.state.postgresql_db.cursor()
-        
-        query = """
-            SELECT * FROM AIJobs WHERE JobID = %s AND CreatedBy = %s;
-        """
-        
-        cur.execute(query, (job_uuid, user_uuid,))
-        row = cur.fetchone()
+        with getConnection(app) as conn, conn.cursor() as cur:
+            query = """
+                SELECT JobID, CreatedBy, JobType, Status, Created, Finished, StageTimings
+                FROM AIJobs
+                WHERE JobID = %s AND CreatedBy = %s;
+            """
+            
+            cur.execute(query, (job_uuid, user_uuid,))
+            row = cur.fetchone()
 
         if row is None:
             logger.error(f"No details found for Job UUID: {job_uuid} and User UUID: {user_uuid}")
@@ -168,21 +176,22 @@ def getJob(app, job_uuid, user_uuid):
 
         logger.info(f"Details found for Job UUID: {job_uuid} and User UUID: {user_uuid}")
 
+        # Running jobs may have reached a later stage that is still buffered in memory, that stage is returned first.
+        buffered_status = app.state.job_status.get(job_uuid)
+
         result = {
             "JobID": str(row[0]),
             "CreatedBy": str(row[1]),
             "JobType": row[2],
-            "Status": row[3],
+            "Status": buffered_status or row[3],
             "Created": row[4].isoformat(),
-            "Finished": row[5].isoformat() if row[5] else None
+            "Finished": row[5].isoformat() if row[5] else None,
+            "StageTimings": row[6]
         }
 
     except Exception as e:
         # Catches and handles any exceptions that may occur during the database operation.
-        app.state.postgresql_db.rollback()
         logger.error(f"Error fetching Job: {e}")
-    finally:
-        cur.close()
 
     # Returns the result dictionary containing the job details, or None if no details were found.
     return result
@@ -193,117 +202,118 @@ def updateJobStatus(app, job_uuid, new_status):
     
     try:
         # Tries to execute the following block of code which involves interacting with the database to update the job status.
-        cur = app.state.postgresql_db.cursor()
-        
-        query = """
-            UPDATE AIJobs
-            SET Status = %s
-            WHERE JobID = %s;
-        """
-        
-        cur.execute(query, (
-            new_status,
-            job_uuid
-        ))
-        
-        app.state.postgresql_db.commit()
+        with getConnection(app) as conn, conn.cursor() as cur:
+            query = """
+                UPDATE AIJobs
+                SET Status = %s
+                WHERE JobID = %s;
+            """
+            
+            cur.execute(query, (
+                new_status,
+                job_uuid
+            ))
+            
+            conn.commit()
+            rowcount = cur.rowcount
         
-        if cur.rowcount == 0:
+        if rowcount == 0:
             logger.warning(f"No AI job found with Job UUID: {job_uuid}")
         else:
             logger.info(f"AI job status updated successfully for Job UUID: {job_uuid} to {new_status}")
     
     except psycopg2.DatabaseError as e:
         # Catches and handles any exceptions that may occur during the database operation.
-        app.state.postgresql_db.rollback()
         logger.error(f"Database error while updating AI job status: {e}")
         return False
     except Exception as e:
         # Catches and handles any exceptions that may occur during the database operation.
         logger.error(f"An unexpected error occurred while updating AI job status: {e}")
         return False
-    finally:
-        cur.close()
     
     # Returns True to indicate that the job status was updated successfully, otherwise returns False.
     return True
 
-def completeJob(app, job_uuid):
+class JobLeaseLost(Exception):
+    # Raised when a worker can't record a job's outcome because its lease lapsed and the job was reclaimed.
+    pass
+
+def completeJob(app, job_uuid, lease):
     # This function marks an AI job as completed in the PostgreSQL database using Job UUID.
+    # Only the holder of the job's lease (as claimed from the queue) may complete it, JobLeaseLost is raised otherwise.
     logger.info(f"Marking AI job as completed for Job UUID: {job_uuid}")
+    # Completion is always written durably, the job's buffered stage is replaced by it. The write is retried,
+    # and if it still fails the error is raised, so the worker never counts an unrecorded completion as a success.
+    stage_timings = app.state.job_status.finish(job_uuid)
     
-    try:
-        # Tries to execute the following block of code which involves interacting with the database to update the job status and completion time.
-        cur = app.state.postgresql_db.cursor()
-        
-        query = """
-            UPDATE AIJobs
-            SET Status = %s, Finished = %s
-            WHERE JobID = %s;
-        """
-        
-        finished_at = datetime.utcnow()
+    for attempt in range(1, JOB_COMPLETE_ATTEMPTS + 1):
+        try:
+            # Tries to execute the following block of code which involves interacting with the database to update the job status and completion time.
+            with getConnection(app) as conn, conn.cursor() as cur:
+                # Completing a job also takes it off the queue and drops its payload.
+                query = """
+                    UPDATE AIJobs
+                    SET Status = %s, Finished = %s, QueueState = 'Done', Payload = NULL, LockedBy = NULL, StageTimings = %s
+                    WHERE JobID = %s AND LockedBy = %s AND QueueState = 'Running'
+                    RETURNING JobType, EXTRACT(EPOCH FROM Finished - Created);
+                """
+                
+                finished_at = datetime.utcnow()
+                
+                cur.execute(query, (
+                    "Completed",
+                    finished_at,
+                    psycopg2.extras.Json(stage_timings),
+                    job_uuid,
+                    lease
+                ))
+                row = cur.fetchone()
+                
+                conn.commit()
+            break
         
-        cur.execute(query, (
-            "Completed",
-            finished_at,
-            job_uuid
-        ))
-        
-        app.state.postgresql_db.commit()
-        
-        if cur.rowcount == 0:
-            logger.warning(f"No AI job found with Job UUID: {job_uuid}")
-        else:
-            logger.info(f"AI job marked as completed successfully for Job UUID: {job_uuid} at {finished_at}")
-        
-        return True
+        except Exception as e:
+            # Catches and handles any exceptions that may occur during the database operation, retrying with backoff.
+            if attempt == JOB_COMPLETE_ATTEMPTS:
+                logger.error(f"Failed to mark AI job as completed for Job UUID: {job_uuid} after {attempt} attempts: {e}")
+                raise
+            delay = JOB_COMPLETE_RETRY_DELAY * 2 ** (attempt - 1)
+            logger.warning(f"Failed to mark AI job as completed for Job UUID: {job_uuid}, retrying in {delay}s: {e}")
+            time.sleep(delay)
     
-    except psycopg2.DatabaseError as e:
-        # Catches and handles any exceptions that may occur during the database operation.
-        app.state.postgresql_db.rollback()
-        logger.error(f"Database error while marking AI job as completed: {e}")
-    
-    except Exception as e:
-        # Catches and handles any exceptions that may occur during the database operation.
-        logger.error(f"An unexpected error occurred while marking AI job as completed: {e}")
-    
-    finally:
-        cur.close()
+    if row is None:
+        raise JobLeaseLost(f"Job UUID: {job_uuid} is no longer held by lease {lease}, not marking it completed")
+    app.state.metrics.observe("mart_job_duration_seconds", float(row[1]), job_type=row[0], outcome="completed")
+    logger.info(f"AI job marked as completed successfully for Job UUID: {job_uuid} at {finished_at}")
     
-    # Returns True to indicate that the job was marked as completed successfully, otherwise returns False.
-    return False
+    # Returns True once the completion has been recorded.
+    return True
 
-def getRecentJobs(app, user_uuid):
-    # This function retrieves recent AI jobs (from the past hour) for a given user from the PostgreSQL database.
-    logger.info("Getting jobs from user in past hour")
+def countRecentJobs(app, user_uuid):
+    # This function counts the AI jobs a given user created in the past hour, using the (CreatedBy, Created) index.
+    logger.info("Counting jobs from user in past hour")
     try:
-        # Tries to execute the following block of code which involves interacting with the database to fetch recent job details.
-        cur = app.state.postgresql_db.cursor()
-
-        query = """
-        SELECT *
-        FROM AIJobs
-        WHERE Created > NOW() - INTERVAL '1 hour' AND CreatedBy = %s;
-        """
+        # Counts rows in SQL rather than fetching them, so only a single integer crosses the wire.
+        with getConnection(app) as conn, conn.cursor() as cur:
+            query = """
+            SELECT COUNT(*)
+            FROM AIJobs
+            WHERE CreatedBy = %s AND Created > NOW() - INTERVAL '1 hour';
+            """
 
-        cur.execute(query, (user_uuid,))
-        
-        recent_jobs = cur.fetchall()
+            cur.execute(query, (user_uuid,))
+            
+            (n_recent_jobs,) = cur.fetchone()
         
-        return recent_jobs
+        return n_recent_jobs
 
     except psycopg2.DatabaseError as e:
         # Catches and handles any exceptions that may occur during the database operation.
-        app.state.postgresql_db.rollback()
-        logger.error(f"Database error while marking AI job as completed: {e}")
+        logger.error(f"Database error while counting recent AI jobs: {e}")
     
     except Exception as e:
         # Catches and handles any exceptions that may occur during the database operation.
-        logger.error(f"An unexpected error occurred while marking AI job as completed: {e}")
-    
-    finally:
-        cur.close()
+        logger.error(f"An unexpected error occurred while counting recent AI jobs: {e}")
 
-    # Returns a list of recent jobs or an empty list if no jobs were found or an error occurred.
-    return []
\ No newline at end of file
+    # Returns None so callers can tell a failed count apart from zero jobs.
+    return None
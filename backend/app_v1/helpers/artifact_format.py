@@ -0,0 +1,146 @@
+import faiss, gzip, io, json, pickle, struct, uuid
+import numpy as np
+
+# Layout of a .mart resume artifact, all integers little-endian:
+#   header   magic "MART", u16 version, u16 dtype code, u32 vector count, u32 dimension,
+#            u32 chunk count, 16 byte artifact UUID, u16 index kind code, u16 reserved,
+#            u32 index parameter, padded to HEADER_SIZE (version 1 headers end at the UUID)
+#   vectors  count * dimension float16/float32 values, row-major and L2-normalized
+#   lengths  chunk count u32 UTF-8 byte lengths
+#   chunks   the chunks' UTF-8 bytes, concatenated
+# Sections start on 8 byte boundaries so the vectors can be viewed in place with np.frombuffer or mmap.
+MAGIC = b"MART"
+VERSION = 2
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<4sHHIII16s")
+_INDEX_FIELDS = struct.Struct("<HHI")
+DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f2")}
+DTYPE_CODES = {"float32": 1, "float16": 2}
+# The index a loader should build over the vectors. The parameter is HNSW's M or IVF's nlist, 0 for flat.
+INDEX_KINDS = {0: "flat", 1: "hnsw", 2: "ivf"}
+INDEX_KIND_CODES = {"flat": 0, "hnsw": 1, "ivf": 2}
+
+class ArtifactFormatError(ValueError):
+    pass
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def encodeArtifact(
+    artifact_id: str,
+    vecs: np.ndarray,
+    chunks: list,
+    dtype: str = "float32",
+    index_kind: str = "flat",
+    index_param: int = 0
+) -> bytes:
+    # Serializes a resume's normalized chunk vectors and chunk texts into a single artifact.
+    if dtype not in DTYPE_CODES:
+        raise ArtifactFormatError(f"Unsupported vector dtype: {dtype}")
+    if index_kind not in INDEX_KIND_CODES:
+        raise ArtifactFormatError(f"Unsupported index kind: {index_kind}")
+    if len(vecs) != len(chunks):
+        raise ArtifactFormatError(f"{len(vecs)} vectors for {len(chunks)} chunks")
+
+    code = DTYPE_CODES[dtype]
+    vectors = np.ascontiguousarray(vecs, dtype=DTYPES[code])
+    encoded = [chunk.encode("utf-8") for chunk in chunks]
+    lengths = np.array([len(b) for b in encoded], dtype="<u4")
+    count, dim = vectors.shape
+
+    out = io.BytesIO()
+    out.write(_HEADER.pack(MAGIC, VERSION, code, count, dim, len(encoded), uuid.UUID(artifact_id).bytes))
+    out.write(_INDEX_FIELDS.pack(INDEX_KIND_CODES[index_kind], 0, index_param))
+    out.write(b"\0" * (HEADER_SIZE - out.tell()))
+    out.write(vectors.tobytes())
+    out.write(b"\0" * (_align(out.tell()) - out.tell()))
+    out.write(lengths.tobytes())
+    out.write(b"".join(encoded))
+    return out.getvalue()
+
+class _ChunkSequence:
+    # The chunks of an artifact, decoded from the underlying buffer only when indexed.
+    def __init__(self, view: memoryview, starts: list, ends: list):
+        self._view = view
+        self._starts = starts
+        self._ends = ends
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, i):
+        return str(self._view[self._starts[i]:self._ends[i]], "utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+class ArtifactView:
+    # A parsed artifact over bytes, a memoryview or an mmap. The vectors are a read-only view into
+    # the buffer and chunks are decoded on access, so nothing is copied onto the heap up front.
+    def __init__(self, buf):
+        view = memoryview(buf)
+        if len(view) < HEADER_SIZE:
+            raise ArtifactFormatError("Artifact is truncated")
+
+        magic, version, code, count, dim, n_chunks, raw_id = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ArtifactFormatError("Not a resume artifact")
+        if version not in (1, VERSION):
+            raise ArtifactFormatError(f"Unsupported artifact version: {version}")
+        if code not in DTYPES:
+            raise ArtifactFormatError(f"Unknown vector dtype code: {code}")
+
+        # Version 1 artifacts predate index selection and were always searched with a flat index.
+        kind_code, index_param = 0, 0
+        if version >= 2:
+            kind_code, _, index_param = _INDEX_FIELDS.unpack_from(view, _HEADER.size)
+        if kind_code not in INDEX_KINDS:
+            raise ArtifactFormatError(f"Unknown index kind code: {kind_code}")
+
+        dtype = DTYPES[code]
+        offset = HEADER_SIZE
+        self.vectors = np.frombuffer(view, dtype=dtype, count=count * dim, offset=offset).reshape(count, dim)
+        offset = _align(offset + count * dim * dtype.itemsize)
+        lengths = np.frombuffer(view, dtype="<u4", count=n_chunks, offset=offset)
+        offset += n_chunks * 4
+
+        ends = offset + np.cumsum(lengths, dtype=np.int64)
+        if n_chunks and ends[-1] > len(view):
+            raise ArtifactFormatError("Artifact is truncated")
+        starts = np.concatenate(([offset], ends[:-1])) if n_chunks else ends
+
+        self.artifact_id = str(uuid.UUID(bytes=bytes(raw_id)))
+        self.index_kind = INDEX_KINDS[kind_code]
+        self.index_param = index_param
+        self.chunks = _ChunkSequence(view, starts.tolist(), ends.tolist())
+
+def decodeArtifact(buf) -> tuple:
+    # Parses an artifact, returning (artifact_id, vectors, chunks) with the chunks decoded into a list.
+    # The vectors are a read-only view into buf, not a copy.
+    artifact = ArtifactView(buf)
+    return artifact.artifact_id, artifact.vectors, list(artifact.chunks)
+
+class _NumpyArrayUnpickler(pickle.Unpickler):
+    # Legacy .pkl artifacts are a pickled numpy uint8 array (faiss.serialize_index's output).
+    # Only the globals needed to rebuild such an array are allowed, so a crafted pickle can't run code.
+    ALLOWED = {
+        ("numpy", "ndarray"),
+        ("numpy", "dtype"),
+        ("numpy.core.multiarray", "_reconstruct"),
+        ("numpy._core.multiarray", "_reconstruct")
+    }
+
+    def find_class(self, module, name):
+        if (module, name) not in self.ALLOWED:
+            raise pickle.UnpicklingError(f"Refusing to load {module}.{name} from a legacy artifact")
+        return super().find_class(module, name)
+
+def readLegacyArtifact(pickled_index, chunks_blob: bytes) -> tuple:
+    # Migration reader for the old pair of objects, a pickled serialized FAISS index (.pkl) and a
+    # gzip JSON bundle of chunks (.bin), returning (artifact_id, vectors, chunks) like decodeArtifact.
+    serialized = _NumpyArrayUnpickler(pickled_index).load()
+    index = faiss.deserialize_index(serialized)
+    vectors = index.reconstruct_n(0, index.ntotal)
+
+    bundle = json.loads(gzip.decompress(chunks_blob).decode("utf-8"))
+    return bundle["uuid"], vectors, bundle["chunks"]
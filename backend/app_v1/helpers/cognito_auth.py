@@ -1,9 +1,16 @@
 import hmac, hashlib, base64
 from pydantic import BaseModel
 from fastapi import Request, HTTPException, Form
-import os, logging
+import os, logging, jwt, time
 
+COGNITO_CLIENT_ID = os.getenv("COGNITO_CLIENT_ID")
 COGNITO_CLIENT_SECRET = os.getenv("COGNITO_CLIENT_SECRET")
+COGNITO_REGION = os.getenv("COGNITO_REGION", "ap-southeast-2")
+COGNITO_USER_POOL_ID = os.getenv("COGNITO_USER_POOL_ID")
+COGNITO_ISSUER = os.getenv(
+    "COGNITO_ISSUER",
+    f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,6 +46,44 @@ def verifyCognitoToken(cognito_client, access_token):
         logger.error(f"An error occurred while verifying the token: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+def verifyCognitoTokenLocally(jwks, access_token):
+    # This function verifies a Cognito access token's signature and claims against the cached JWKS, without calling Cognito.
+    try:
+        header = jwt.get_unverified_header(access_token)
+        signing_key = jwks.getSigningKey(header.get("kid"))
+
+        claims = jwt.decode(
+            access_token,
+            signing_key.key,
+            algorithms=["RS256"],
+            issuer=COGNITO_ISSUER,
+            options={"require": ["exp", "iat", "sub", "token_use"], "verify_aud": False}
+        )
+    except jwt.PyJWTError as e:
+        # Catches invalid signatures, expired tokens and unknown signing keys, raising a 401 Unauthorized exception.
+        logger.error(f"Token is not authorized: {e}")
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    # Cognito access tokens carry the app client in `client_id` rather than `aud`.
+    if claims.get("token_use") != "access" or claims.get("client_id") != COGNITO_CLIENT_ID:
+        logger.error("Token is not an access token for this app client")
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    return claims
+
+def _tokenCacheKey(access_token):
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+def invalidateUserAttributes(app, access_token):
+    # This function drops cached attributes for the token's user, e.g. after their subscription level changes.
+    # Attributes cached for the user's other tokens before this point are ignored too.
+    entry = app.state.user_attributes_cache.pop(_tokenCacheKey(access_token))
+    if entry is not None:
+        user_data, _ = entry
+        for attr in user_data['UserAttributes']:
+            if attr['Name'] == "sub":
+                app.state.user_attributes_invalidated.set(attr['Value'], time.time())
+
 def authenticateSession(request: Request):
     # This function authenticates a session by verifying a Cognito access token from the request's Authorization header.
     auth_header = request.headers.get("Authorization")
@@ -48,12 +93,26 @@ def authenticateSession(request: Request):
 
     # Extracts the access token from the Authorization header.
     token = auth_header.split(" ")[1]
+    app = request.app
     try:
-        # Calls verifyCognitoToken with the Cognito client and the extracted token to authenticate the user.
-        user_data = verifyCognitoToken(request.app.state.cognito, token)
+        # Verifies the token locally, this rejects forged, expired and foreign tokens without a network hop.
+        claims = verifyCognitoTokenLocally(app.state.jwks, token)
+
+        # User attributes (e.g. custom:subscriptionLevel) aren't in the access token, so they are cached per token
+        # and only fetched from Cognito on a miss. Entries never outlive the token itself.
+        key = _tokenCacheKey(token)
+        entry = app.state.user_attributes_cache.get(key)
+        invalidated_at = app.state.user_attributes_invalidated.get(claims["sub"], 0)
+        if entry is None or entry[1] < invalidated_at:
+            user_data = verifyCognitoToken(app.state.cognito, token)
+            app.state.user_attributes_cache.set(key, (user_data, time.time()), ttl=claims["exp"] - time.time())
+        else:
+            user_data = entry[0]
+
+        # Returns a copy of the user data so callers can't modify the cached entry.
+        user_data = dict(user_data)
         user_data["AccessToken"] = token
-        # Returns the user data if the token is valid.
         return user_data
     except Exception as e:
         # Catches any exceptions that may occur during the authentication process, logging an error message and raising a 401 Unauthorized exception.
-        raise HTTPException(status_code=401, detail=f"Failed to authenticate user: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail=f"Failed to authenticate user: {e}")
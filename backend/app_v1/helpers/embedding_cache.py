@@ -0,0 +1,93 @@
+import psycopg2, psycopg2.extras, hashlib, logging, os
+import numpy as np
+from app_v1.helpers.postgresql_pool import getConnection
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_MAX_AGE_DAYS = int(os.getenv("EMBEDDING_CACHE_MAX_AGE_DAYS", "90"))
+
+def createEmbeddingCacheTable(app):
+    # This function creates the 'EmbeddingCache' table and prunes entries older than EMBEDDING_CACHE_MAX_AGE_DAYS.
+    # Embeddings are keyed by the embedder model and the SHA-256 of the embedded text, and stored as raw float32 bytes.
+    logger.info("Creating Embedding Cache Table...")
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS EmbeddingCache (
+                    Model VARCHAR(200),
+                    TextHash BYTEA,
+                    Embedding BYTEA NOT NULL,
+                    Created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (Model, TextHash)
+                );
+            """)
+            if EMBEDDING_CACHE_MAX_AGE_DAYS > 0:
+                cur.execute("""
+                    DELETE FROM EmbeddingCache
+                    WHERE Created < NOW() - make_interval(days => %s);
+                """, (EMBEDDING_CACHE_MAX_AGE_DAYS,))
+                if cur.rowcount:
+                    logger.info(f"Pruned {cur.rowcount} cached embeddings")
+            conn.commit()
+    except Exception as e:
+        logger.error(f"An error occurred when creating Embedding Cache Table: {e}")
+        return False
+    return True
+
+def _text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+def _lookup(app, model: str, hashes: list) -> dict:
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT TextHash, Embedding
+                FROM EmbeddingCache
+                WHERE Model = %s AND TextHash = ANY(%s);
+            """, (model, [psycopg2.Binary(h) for h in hashes]))
+            rows = cur.fetchall()
+        return {bytes(h): np.frombuffer(bytes(e), dtype="float32") for h, e in rows}
+    except Exception as e:
+        # The cache is an optimisation, if it can't be read every text is embedded.
+        logger.error(f"Failed to read embedding cache: {e}")
+        return {}
+
+def _store(app, model: str, entries: list):
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            psycopg2.extras.execute_values(cur, """
+                INSERT INTO EmbeddingCache (Model, TextHash, Embedding)
+                VALUES %s
+                ON CONFLICT (Model, TextHash) DO NOTHING;
+            """, [(model, psycopg2.Binary(h), psycopg2.Binary(vec.tobytes())) for h, vec in entries])
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to write {len(entries)} embeddings to the cache: {e}")
+
+def embedTexts(app, texts: list, model: str, operation: str) -> np.ndarray:
+    # This function embeds texts with app.state.embedding_service, returning a (len(texts), D) float32 array in input order.
+    # Texts already embedded by `model` are read from the cache, only the misses are sent to the embedder, once each.
+    # Processes without a database, such as the benchmarks, embed every text.
+    use_cache = getattr(app.state, "postgresql_pool", None) is not None
+    hashes = [_text_hash(text) for text in texts]
+    unique = dict(zip(hashes, texts))
+
+    cached = _lookup(app, model, list(unique)) if use_cache else {}
+    misses = [(h, text) for h, text in unique.items() if h not in cached]
+
+    metrics = app.state.metrics
+    metrics.inc("mart_embedding_cache_hits_total", len(unique) - len(misses), operation=operation)
+    metrics.inc("mart_embedding_cache_misses_total", len(misses), operation=operation)
+
+    if misses:
+        # Timed from the job's side, including time spent queued and batched with other jobs' texts.
+        with metrics.time("mart_external_call_seconds", service="embedder", operation=operation):
+            vecs = app.state.embedding_service.embed([text for _, text in misses], model)
+        fresh = [(h, vec) for (h, _), vec in zip(misses, vecs)]
+        cached.update(fresh)
+        if use_cache:
+            _store(app, model, fresh)
+
+    return np.stack([cached[h] for h in hashes])
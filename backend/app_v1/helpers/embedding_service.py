@@ -0,0 +1,179 @@
+import logging, random, threading, time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import openai
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _is_retryable(e: Exception) -> bool:
+    # Connection errors, timeouts and 408, 409, 429 and 5xx responses are transient. Other 4xx responses
+    # and any other exception, e.g. a TypeError from bad input, would fail again.
+    if isinstance(e, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    status = getattr(e, "status_code", None)
+    return status is not None and (status in (408, 409, 429) or status >= 500)
+
+class _PendingText:
+    __slots__ = ("text", "model", "queued", "future")
+
+    def __init__(self, text: str, model: str):
+        self.text = text
+        self.model = model
+        self.queued = time.monotonic()
+        self.future = Future()
+
+class EmbeddingService:
+    # Sends texts to the embedder (an OpenAI-compatible client) in bounded batches on behalf of every job
+    # in the process. Texts are queued and a dispatcher thread groups them by model into requests of at
+    # most `max_batch` texts, waiting up to `batch_window` seconds after the oldest queued text for
+    # concurrent jobs' texts to fill a request. A large input is split across several requests, and at
+    # most `max_in_flight` requests run at once. Failed requests are retried with jittered exponential backoff.
+    def __init__(
+        self,
+        client,
+        max_batch: int = 64,
+        batch_window: float = 0.01,
+        max_in_flight: int = 4,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5,
+        metrics=None
+    ):
+        self.client = client
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.metrics = metrics
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embedder")
+        self._closed = False
+
+        self.requests = 0
+        self.texts = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="embedding-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def embed(self, texts: list, model: str) -> np.ndarray:
+        # Returns a (len(texts), D) float32 array in input order, blocking until every batch holding one of the texts is done.
+        if not texts:
+            return np.empty((0, 0), dtype="float32")
+        items = [_PendingText(text, model) for text in texts]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Embedding service is shut down")
+            self._pending.extend(items)
+            self._cond.notify()
+        return np.stack([item.future.result() for item in items])
+
+    def _next_batch(self):
+        # Called with the condition held, returns the next batch or None once shut down and drained.
+        while not self._pending and not self._closed:
+            self._cond.wait()
+        if not self._pending:
+            return None
+
+        deadline = self._pending[0].queued + self.batch_window
+        while len(self._pending) < self.max_batch and not self._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+
+        model = self._pending[0].model
+        batch, rest = [], deque()
+        while self._pending:
+            item = self._pending.popleft()
+            if item.model == model and len(batch) < self.max_batch:
+                batch.append(item)
+            else:
+                rest.append(item)
+        self._pending = rest
+        return batch
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+            if batch is None:
+                return
+            # Blocks while max_in_flight requests are running, so queued texts keep filling the next batch.
+            self._slots.acquire()
+            with self._cond:
+                self.in_flight += 1
+            self._executor.submit(self._send, batch)
+
+    def _send(self, batch: list):
+        try:
+            data = self._create(batch[0].model, [item.text for item in batch])
+            if len(data) != len(batch):
+                raise ValueError(f"Embedder returned {len(data)} embeddings for {len(batch)} texts")
+            for item, embedding in zip(batch, data):
+                item.future.set_result(np.array(embedding.embedding, dtype="float32"))
+        except Exception as e:
+            with self._cond:
+                self.failures += 1
+            logger.error(f"Embedding request of {len(batch)} texts failed: {e}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def _create(self, model: str, texts: list) -> list:
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                resp = self.client.embeddings.create(model=model, input=texts)
+                return resp.data
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                error = e
+            finally:
+                with self._cond:
+                    self.requests += 1
+                    self.texts += len(texts)
+                if self.metrics is not None:
+                    self.metrics.observe(
+                        "mart_external_call_seconds", time.perf_counter() - started,
+                        service="embedder", operation="embeddings_request"
+                    )
+
+            delay = self.retry_base_delay * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.info(f"Embedding request failed ({error}), retrying in {delay:.2f}s")
+            with self._cond:
+                self.retries += 1
+            time.sleep(delay)
+
+    def shutdown(self):
+        # Stops accepting texts, sends those already queued and waits for requests in flight.
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "requests": self.requests,
+                "texts": self.texts,
+                "retries": self.retries,
+                "failures": self.failures
+            }
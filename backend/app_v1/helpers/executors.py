@@ -0,0 +1,20 @@
+import asyncio, functools, logging
+from fastapi import HTTPException
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def runBlocking(app, executor: str, timeout: float, stage: str, fn, *args, **kwargs):
+    # Runs a blocking call on one of the app's bounded executors so the event loop stays free.
+    # The timeout covers time queued for a worker as well as the call itself; a timed out call
+    # keeps its worker until it returns, but the request fails fast with 504 Gateway Timeout.
+    # A timeout of None waits for the call to return, for writes that would still commit after the
+    # request gave up on them; those bound their own time, e.g. with a statement timeout.
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(app.state.executors[executor], functools.partial(fn, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"{stage} timed out after {timeout}s")
+        raise HTTPException(status_code=504, detail=f"{stage} timed out")
@@ -0,0 +1,103 @@
+import psycopg2, psycopg2.extras, hashlib, json, logging, os
+from app_v1.helpers.postgresql_pool import getConnection
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The cache is opt-in, 0 disables it.
+GENERATION_CACHE_TTL_HOURS = float(os.getenv("GENERATION_CACHE_TTL_HOURS", "0"))
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "10000"))
+
+def createGenerationCacheTable(app):
+    # This function creates the 'GenerationCache' table and prunes expired entries, and the least recently
+    # used beyond GENERATION_CACHE_MAX_ENTRIES. Responses are keyed by generationKey and stored as JSONB.
+    logger.info("Creating Generation Cache Table...")
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS GenerationCache (
+                    PromptHash BYTEA PRIMARY KEY,
+                    Response JSONB NOT NULL,
+                    Created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    LastUsed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            cur.execute("CREATE INDEX IF NOT EXISTS GenerationCacheLastUsed ON GenerationCache (LastUsed);")
+            if GENERATION_CACHE_TTL_HOURS > 0:
+                cur.execute("""
+                    DELETE FROM GenerationCache
+                    WHERE Created < NOW() - make_interval(secs => %s);
+                """, (GENERATION_CACHE_TTL_HOURS * 3600,))
+                if cur.rowcount:
+                    logger.info(f"Pruned {cur.rowcount} expired cached generations")
+                _evict(cur)
+            conn.commit()
+    except Exception as e:
+        logger.error(f"An error occurred when creating Generation Cache Table: {e}")
+        return False
+    return True
+
+def _evict(cur):
+    cur.execute("""
+        DELETE FROM GenerationCache
+        WHERE PromptHash IN (
+            SELECT PromptHash
+            FROM GenerationCache
+            ORDER BY LastUsed DESC
+            OFFSET %s
+        );
+    """, (GENERATION_CACHE_MAX_ENTRIES,))
+
+def generationKey(*parts) -> bytes:
+    # This function hashes everything that determines a generation, e.g. the system text, prompt,
+    # response schema and model URL. Parts that aren't strings are hashed as canonical JSON.
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, str) else json.dumps(part, sort_keys=True, separators=(",", ":"))
+        encoded = data.encode("utf-8")
+        # Length-prefixed, so moving text between parts changes the key.
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.digest()
+
+def getCachedGeneration(app, key: bytes):
+    # This function returns the cached response for key if it is younger than GENERATION_CACHE_TTL_HOURS, or None.
+    if GENERATION_CACHE_TTL_HOURS <= 0:
+        return None
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE GenerationCache
+                SET LastUsed = NOW()
+                WHERE PromptHash = %s AND Created >= NOW() - make_interval(secs => %s)
+                RETURNING Response;
+            """, (psycopg2.Binary(key), GENERATION_CACHE_TTL_HOURS * 3600))
+            row = cur.fetchone()
+            conn.commit()
+    except Exception as e:
+        # The cache is an optimisation, if it can't be read the response is generated.
+        logger.error(f"Failed to read generation cache: {e}")
+        return None
+
+    hit = row is not None
+    app.state.metrics.inc("mart_generation_cache_hits_total" if hit else "mart_generation_cache_misses_total")
+    return row[0] if hit else None
+
+def storeGeneration(app, key: bytes, response: dict):
+    # This function caches a response, replacing any older one for key, and evicts the least recently
+    # used entries beyond GENERATION_CACHE_MAX_ENTRIES.
+    if GENERATION_CACHE_TTL_HOURS <= 0:
+        return
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO GenerationCache (PromptHash, Response)
+                VALUES (%s, %s)
+                ON CONFLICT (PromptHash) DO UPDATE
+                SET Response = EXCLUDED.Response, Created = NOW(), LastUsed = NOW();
+            """, (psycopg2.Binary(key), psycopg2.extras.Json(response)))
+            _evict(cur)
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to write generation cache: {e}")
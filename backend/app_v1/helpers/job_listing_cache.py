@@ -0,0 +1,152 @@
+import logging, threading, time
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a link was clicked, they never change the listing.
+_TRACKING_PARAMS = {"trk", "trkinfo", "refid", "trackingid", "lipi", "ebp", "fbclid", "gclid"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# Fields a cover letter can't be written without.
+REQUIRED_LISTING_FIELDS = ("title", "company", "location", "description")
+
+def normalizeListingUrl(url: str) -> str:
+    # This function returns the cache key of a job listing URL: lower-case scheme and host, no default port,
+    # fragment or trailing slash, tracking parameters (utm_* and LinkedIn's) dropped and the rest sorted.
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def missingListingFields(fields: dict) -> list:
+    # This function returns the required fields the extractor found no text for.
+    return [field for field in REQUIRED_LISTING_FIELDS if not fields.get(field)]
+
+class JobListingUnavailable(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"Job listing returned HTTP {status_code}")
+        self.status_code = status_code
+
+class _Listing:
+    __slots__ = ("fields", "etag", "last_modified", "generation", "validated")
+
+    def __init__(self, fields: dict, etag: str, last_modified: str, generation: int):
+        self.fields = fields
+        self.etag = etag
+        self.last_modified = last_modified
+        # The extractor's selector generation the fields were parsed with.
+        self.generation = generation
+        self.validated = time.monotonic()
+
+class JobListingCache:
+    # A process-wide LRU cache of extracted job listing fields (title, company, location, description)
+    # keyed by normalized URL, the raw HTML is never kept. Entries are served for `ttl` seconds, then
+    # revalidated with If-None-Match/If-Modified-Since, so an unchanged listing costs a 304 and no parsing.
+    # Fields parsed before the extractor's selectors were reloaded are refetched in full and parsed again.
+    # Concurrent requests for the same listing share a single fetch and parse.
+    # Listings missing a required field aren't cached, the page may have been served without them.
+    def __init__(self, ttl: float, max_entries: int, fetch_timeout: float = 5):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.fetch_timeout = fetch_timeout
+        self.session = requests.Session()
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get(self, url: str, extractor) -> dict:
+        # Returns the fields of the listing at url, calling extractor.extract(html) only when its HTML was
+        # (re)fetched. extractor is a JobListingExtractor, or anything with extract(html) and generation().
+        # Raises JobListingUnavailable if the listing doesn't answer 200 (or 304 to a revalidation).
+        key = normalizeListingUrl(url)
+        generation = extractor.generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation != generation:
+                # Parsed with replaced selectors, a 304 would keep those fields, so it isn't revalidated.
+                entry = None
+            if entry is not None and time.monotonic() - entry.validated < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.fields
+
+            self.misses += 1
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._loading[key] = future
+
+        if not owner:
+            # Another request is already fetching this listing, wait for its result.
+            return future.result()
+
+        try:
+            listing = self._fetch(url, entry, extractor.extract, generation)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[key]
+            if not missingListingFields(listing.fields):
+                self._entries[key] = listing
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        future.set_result(listing.fields)
+        return listing.fields
+
+    def _fetch(self, url: str, stale: _Listing, parse, generation: int) -> _Listing:
+        headers = {}
+        if stale is not None:
+            if stale.etag:
+                headers["If-None-Match"] = stale.etag
+            if stale.last_modified:
+                headers["If-Modified-Since"] = stale.last_modified
+
+        response = self.session.get(url, headers=headers, timeout=self.fetch_timeout)
+        if response.status_code == 304 and stale is not None:
+            with self._lock:
+                self.revalidations += 1
+            return _Listing(
+                stale.fields, response.headers.get("ETag", stale.etag),
+                response.headers.get("Last-Modified", stale.last_modified), generation
+            )
+        if response.status_code != 200:
+            raise JobListingUnavailable(response.status_code)
+
+        return _Listing(parse(response.text), response.headers.get("ETag"), response.headers.get("Last-Modified"), generation)
+
+    def close(self):
+        self.session.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions
+            }
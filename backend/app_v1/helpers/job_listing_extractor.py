@@ -0,0 +1,94 @@
+import json, logging, os, threading, time
+import lxml.html
+from lxml.cssselect import CSSSelector
+from lxml.etree import ParserError, XPath
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Text nodes under an element, leaving out script, style and template contents as BeautifulSoup's get_text does.
+_TEXT = XPath("descendant-or-self::text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+
+def _compile(path: str) -> dict:
+    # Returns {field: [CSSSelector, ...]} in the file's order, raising if the file or a selector is invalid.
+    with open(path, "r") as f:
+        selectors = json.load(f)
+    if not selectors:
+        raise ValueError(f"No job listing selectors in {path}")
+    return {field: [CSSSelector(selector) for selector in selector_list] for field, selector_list in selectors.items()}
+
+def _text(element) -> str:
+    # Matches BeautifulSoup's get_text(strip=True): every text node stripped, empty ones dropped, joined with "".
+    return "".join(s.strip() for s in _TEXT(element) if s.strip())
+
+class JobListingExtractor:
+    # Extracts job listing fields from HTML with lxml's C parser and CSS selectors compiled to XPath once.
+    # The selectors file is checked for changes at most every `check_interval` seconds and recompiled when
+    # it changes, a file that fails to load or compile is logged and the previous selectors kept.
+    def __init__(self, path: str, check_interval: float = 5):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._selectors = _compile(path)
+        self._checked = time.monotonic()
+        self.reloads = 0
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return
+                self._selectors = _compile(self.path)
+                self._mtime = mtime
+                self.reloads += 1
+                logger.info(f"Reloaded job listing selectors from {self.path}")
+            except Exception as e:
+                logger.error(f"Failed to reload job listing selectors from {self.path}, keeping the previous ones: {e}")
+
+    def generation(self) -> int:
+        # The number of times the selectors have been reloaded, fields extracted under an older
+        # generation came from selectors that have since been replaced.
+        self._maybe_reload()
+        return self.reloads
+
+    def extract(self, html: str) -> dict:
+        # Returns {field: text or None}. For each field its selectors are tried in order, the first
+        # selector whose first match has text wins, as with BeautifulSoup's select_one.
+        self._maybe_reload()
+        selectors = self._selectors
+
+        try:
+            root = lxml.html.fromstring(html)
+        except ValueError:
+            # lxml refuses str input carrying an XML encoding declaration.
+            root = lxml.html.fromstring(html.encode("utf-8"))
+        except ParserError:
+            # An empty document.
+            return {field: None for field in selectors}
+
+        result = {}
+        for field, compiled in selectors.items():
+            value = None
+            for selector in compiled:
+                matches = selector(root)
+                text = _text(matches[0]) if matches else ""
+                if text:
+                    value = text
+                    break
+            result[field] = value
+        return result
+
+    def stats(self):
+        return {
+            "fields": len(self._selectors),
+            "reloads": self.reloads
+        }
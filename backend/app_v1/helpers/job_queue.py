@@ -0,0 +1,250 @@
+import psycopg2, psycopg2.extras, logging, os, socket, threading, uuid
+from datetime import datetime
+from app_v1.helpers.postgresql_pool import getConnection, setStatementTimeout
+from app_v1.helpers.ai_jobs import getJob, JobLeaseLost
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "10"))
+
+def createAIJobsQueueColumns(app):
+    # This function adds the columns used to queue AI jobs to the 'AIJobs' table, it is safe to run on every startup.
+    # QueueState is NULL for jobs created before the queue existed, so those are never picked up by workers.
+    logger.info("Creating AI Jobs queue columns...")
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                ALTER TABLE AIJobs
+                    ADD COLUMN IF NOT EXISTS QueueState VARCHAR(20) CHECK (QueueState IN ('Queued', 'Running', 'Done', 'Failed')),
+                    ADD COLUMN IF NOT EXISTS Payload JSONB,
+                    ADD COLUMN IF NOT EXISTS Attempts INT DEFAULT 0,
+                    ADD COLUMN IF NOT EXISTS MaxAttempts INT DEFAULT 1,
+                    ADD COLUMN IF NOT EXISTS AvailableAt TIMESTAMP,
+                    ADD COLUMN IF NOT EXISTS LockedBy VARCHAR(100);
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS AIJobs_Queue_idx
+                ON AIJobs (AvailableAt)
+                WHERE QueueState IN ('Queued', 'Running');
+            """)
+            conn.commit()
+    except Exception as e:
+        logger.error(f"An error occurred when creating AI Jobs queue columns: {e}")
+        return False
+    return True
+
+def _strip_nul(value):
+    # PostgreSQL rejects \u0000 in jsonb, and pypdf emits NUL characters for some fonts.
+    if isinstance(value, str):
+        return value.replace("\x00", "")
+    if isinstance(value, dict):
+        return {_strip_nul(k): _strip_nul(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_strip_nul(v) for v in value]
+    return value
+
+def enqueueJob(app, job_uuid, user_uuid, job_type, payload, max_attempts=JOB_MAX_ATTEMPTS, statement_timeout=None):
+    # This function durably queues a new AI job, a worker picks it up from the 'AIJobs' table.
+    # NUL characters are dropped from the payload's strings, the Payload column can't store them.
+    logger.info(f"Queueing {job_type} job with Job UUID: {job_uuid} and User UUID: {user_uuid}")
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            setStatementTimeout(cur, statement_timeout)
+            now = datetime.utcnow()
+            cur.execute("""
+                INSERT INTO AIJobs (JobID, CreatedBy, JobType, Status, Created, QueueState, Payload, Attempts, MaxAttempts, AvailableAt)
+                VALUES (%s, %s, %s, %s, %s, 'Queued', %s, 0, %s, %s);
+            """, (
+                job_uuid,
+                user_uuid,
+                job_type,
+                "Queued",
+                now,
+                psycopg2.extras.Json(_strip_nul(payload)),
+                max_attempts,
+                now
+            ))
+            conn.commit()
+        return True
+    except psycopg2.DatabaseError as e:
+        logger.error(f"Database error while queueing AI job: {e}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while queueing AI job: {e}")
+    return False
+
+def claimJob(app, worker_id, visibility_timeout):
+    # This function claims the oldest available job for a worker, or returns None if there isn't one.
+    # Queued jobs and running jobs whose lease has expired (their worker died) are both available.
+    # SKIP LOCKED lets many workers claim concurrently without blocking on each other's rows.
+    # The time since the job became available is returned as its queue wait.
+    # Each claim takes a lease of its own, so a worker thread whose lease lapsed can't act on the job
+    # even if another thread of the same worker has reclaimed it.
+    lease = f"{worker_id}/{uuid.uuid4().hex[:12]}"
+    with getConnection(app) as conn, conn.cursor() as cur:
+        cur.execute("""
+            UPDATE AIJobs
+            SET QueueState = 'Running',
+                Status = 'Starting',
+                Attempts = Attempts + 1,
+                LockedBy = %s,
+                AvailableAt = (NOW() AT TIME ZONE 'UTC') + make_interval(secs => %s)
+            FROM (
+                SELECT JobID, AvailableAt
+                FROM AIJobs
+                WHERE QueueState IN ('Queued', 'Running')
+                AND AvailableAt <= (NOW() AT TIME ZONE 'UTC')
+                ORDER BY AvailableAt
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            ) AS next_job
+            WHERE AIJobs.JobID = next_job.JobID
+            RETURNING AIJobs.JobID, AIJobs.CreatedBy, AIJobs.JobType, AIJobs.Payload, AIJobs.Attempts, AIJobs.MaxAttempts,
+                EXTRACT(EPOCH FROM (NOW() AT TIME ZONE 'UTC') - next_job.AvailableAt);
+        """, (lease, visibility_timeout))
+        row = cur.fetchone()
+        conn.commit()
+
+    if row is None:
+        return None
+
+    return {
+        "JobID": str(row[0]),
+        "CreatedBy": str(row[1]),
+        "JobType": row[2],
+        "Payload": row[3],
+        "Attempts": row[4],
+        "MaxAttempts": row[5],
+        "QueueWait": float(row[6]),
+        # The lease, terminal states are only written while it still holds the job.
+        "LockedBy": lease
+    }
+
+def extendJobLease(app, job_uuid, lease, visibility_timeout):
+    # This function pushes back a running job's lease so other workers don't reclaim it while it is still progressing.
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE AIJobs
+                SET AvailableAt = (NOW() AT TIME ZONE 'UTC') + make_interval(secs => %s)
+                WHERE JobID = %s AND LockedBy = %s AND QueueState = 'Running';
+            """, (visibility_timeout, job_uuid, lease))
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to extend lease for Job UUID: {job_uuid}: {e}")
+
+def retryOrFailJob(app, job, error):
+    # This function requeues a failed job with exponential backoff, or marks it failed once it is out of attempts.
+    # The status keeps the stage the job failed at, as the pipelines used to record it. Nothing is written
+    # if the job's lease has lapsed and another worker has reclaimed it.
+    current = getJob(app, job["JobID"], job["CreatedBy"]) or {}
+    stage = current.get("Status")
+    stage_timings = psycopg2.extras.Json(app.state.job_status.finish(job["JobID"]))
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            if job["Attempts"] < job["MaxAttempts"]:
+                delay = JOB_RETRY_BASE_DELAY * 2 ** (job["Attempts"] - 1)
+                logger.warning(f"Job {job['JobID']} failed on attempt {job['Attempts']}, retrying in {delay}s: {error}")
+                cur.execute("""
+                    UPDATE AIJobs
+                    SET QueueState = 'Queued',
+                        Status = %s,
+                        LockedBy = NULL,
+                        StageTimings = %s,
+                        AvailableAt = (NOW() AT TIME ZONE 'UTC') + make_interval(secs => %s)
+                    WHERE JobID = %s AND LockedBy = %s AND QueueState = 'Running';
+                """, (f"Retrying after Exception: {error} at {stage}"[:500], stage_timings, delay, job["JobID"], job["LockedBy"]))
+                if cur.rowcount == 0:
+                    logger.warning(f"Lease on Job UUID: {job['JobID']} lapsed, leaving it to the worker that reclaimed it")
+            else:
+                logger.error(f"Job {job['JobID']} failed after {job['Attempts']} attempts: {error}")
+                cur.execute("""
+                    UPDATE AIJobs
+                    SET QueueState = 'Failed',
+                        Status = %s,
+                        Payload = NULL,
+                        LockedBy = NULL,
+                        StageTimings = %s,
+                        Finished = %s
+                    WHERE JobID = %s AND LockedBy = %s AND QueueState = 'Running'
+                    RETURNING EXTRACT(EPOCH FROM Finished - Created);
+                """, (f"Job threw an Exception: {error} at {stage}"[:500], stage_timings, datetime.utcnow(), job["JobID"], job["LockedBy"]))
+                row = cur.fetchone()
+                if row is None:
+                    logger.warning(f"Lease on Job UUID: {job['JobID']} lapsed, leaving it to the worker that reclaimed it")
+                else:
+                    app.state.metrics.observe("mart_job_duration_seconds", float(row[0]), job_type=job["JobType"], outcome="failed")
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to record failure of Job UUID: {job['JobID']}: {e}")
+
+class JobWorker:
+    # Consumes queued AI jobs with `concurrency` threads, dispatching each by JobType to `handlers`.
+    # While a job runs its lease is extended every third of `visibility_timeout`; if the worker dies
+    # the lease lapses and another worker reclaims the job.
+    def __init__(self, app, handlers: dict, concurrency: int, poll_interval: float, visibility_timeout: float):
+        self.app = app
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        logger.info(f"Starting job worker {self.worker_id} with concurrency {self.concurrency}")
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = None):
+        # Stops claiming new jobs and waits for running ones to finish.
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                job = claimJob(self.app, self.worker_id, self.visibility_timeout)
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+
+            self._process(job)
+
+    def _heartbeat(self, job, done):
+        while not done.wait(self.visibility_timeout / 3):
+            extendJobLease(self.app, job["JobID"], job["LockedBy"], self.visibility_timeout)
+
+    def _process(self, job):
+        logger.info(f"Running {job['JobType']} job {job['JobID']} (attempt {job['Attempts']} of {job['MaxAttempts']})")
+        self.app.state.metrics.observe("mart_job_queue_wait_seconds", job["QueueWait"], job_type=job["JobType"])
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            if job["Attempts"] > job["MaxAttempts"]:
+                # The job's lease expired on its last attempt, most likely because its worker died.
+                raise Exception("Job lease expired on its final attempt")
+
+            handler = self.handlers.get(job["JobType"])
+            if handler is None:
+                raise Exception(f"No handler for job type {job['JobType']}")
+            handler(self.app, job)
+        except JobLeaseLost as e:
+            # Another worker has reclaimed the job and owns its outcome now.
+            logger.warning(f"Abandoning Job UUID: {job['JobID']}: {e}")
+        except Exception as e:
+            retryOrFailJob(self.app, job, e)
+        finally:
+            done.set()
+            heartbeat.join()
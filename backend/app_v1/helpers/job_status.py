@@ -0,0 +1,133 @@
+import psycopg2, psycopg2.extras, json, logging, threading, time
+from app_v1.helpers.postgresql_pool import getConnection
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def createAIJobsStageTimingsColumn(app):
+    # This function adds the StageTimings column, seconds spent in each pipeline stage, to the 'AIJobs' table.
+    logger.info("Creating AI Jobs stage timings column...")
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("ALTER TABLE AIJobs ADD COLUMN IF NOT EXISTS StageTimings JSONB;")
+            conn.commit()
+    except Exception as e:
+        logger.error(f"An error occurred when creating AI Jobs stage timings column: {e}")
+        return False
+    return True
+
+class JobStatusBuffer:
+    # Buffers pipeline stage transitions in memory and writes them to AIJobs in one batched
+    # UPDATE every `flush_interval` seconds, so a job's many stages cost a few writes, not one each.
+    # Only the latest stage of each job is written. Terminal states (completion, failure, retry)
+    # are written directly by their callers, which first finish the job in the buffer; flushes
+    # only touch running jobs, so a late flush can never overwrite a terminal state.
+    # Each stage is also timed: its duration is observed in mart_job_stage_seconds when the next
+    # stage starts, and the job's per-stage durations are written to StageTimings with its status.
+    def __init__(self, app, flush_interval: float):
+        self.app = app
+        self.flush_interval = flush_interval
+        self._latest = {}
+        self._started = {}
+        self._timings = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-status-flusher", daemon=True)
+
+        self.reports = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join()
+        self.flush()
+
+    def _closeStage(self, job_uuid, now):
+        # Records how long the job spent in its current stage, called with the lock held.
+        stage = self._latest.get(job_uuid)
+        if stage is None:
+            return
+        elapsed = now - self._started[job_uuid]
+        timings = self._timings.setdefault(job_uuid, {})
+        timings[stage] = round(timings.get(stage, 0.0) + elapsed, 3)
+        self.app.state.metrics.observe("mart_job_stage_seconds", elapsed, stage=stage)
+
+    def report(self, job_uuid, status):
+        now = time.perf_counter()
+        with self._lock:
+            self._closeStage(job_uuid, now)
+            self._latest[job_uuid] = status
+            self._started[job_uuid] = now
+            self._dirty.add(job_uuid)
+            self.reports += 1
+
+    def get(self, job_uuid):
+        # Returns the latest buffered stage of a running job, or None.
+        with self._lock:
+            return self._latest.get(job_uuid)
+
+    def finish(self, job_uuid) -> dict:
+        # Ends the job's current stage and drops it from the buffer, returning its stage timings.
+        # Callers write the terminal state (and these timings) themselves.
+        now = time.perf_counter()
+        with self._lock:
+            self._closeStage(job_uuid, now)
+            self._latest.pop(job_uuid, None)
+            self._started.pop(job_uuid, None)
+            self._dirty.discard(job_uuid)
+            return self._timings.pop(job_uuid, {})
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [
+                (job_uuid, self._latest[job_uuid][:500], json.dumps(self._timings.get(job_uuid, {})))
+                for job_uuid in self._dirty
+            ]
+            self._dirty.clear()
+
+        try:
+            with getConnection(self.app) as conn, conn.cursor() as cur:
+                psycopg2.extras.execute_values(cur, """
+                    UPDATE AIJobs
+                    SET Status = v.Status, StageTimings = v.StageTimings::jsonb
+                    FROM (VALUES %s) AS v (JobID, Status, StageTimings)
+                    WHERE AIJobs.JobID = v.JobID::uuid
+                    AND AIJobs.QueueState = 'Running';
+                """, rows)
+                conn.commit()
+            with self._lock:
+                self.flushes += 1
+                self.rows_written += len(rows)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(rows)} job statuses: {e}")
+            # Put the rows back unless a newer stage (or a terminal state) has replaced them since.
+            with self._lock:
+                for job_uuid, status, _ in rows:
+                    if self._latest.get(job_uuid, "")[:500] == status:
+                        self._dirty.add(job_uuid)
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buffered": len(self._latest),
+                "reports": self.reports,
+                "flushes": self.flushes,
+                "rows_written": self.rows_written
+            }
+
+def reportJobStage(app, job_uuid, stage):
+    # This function records the stage a running job has reached, it is written to the database on the next flush.
+    logger.info(f"AI job {job_uuid} reached stage: {stage}")
+    app.state.job_status.report(job_uuid, stage)
@@ -0,0 +1,82 @@
+import jwt, json, logging, requests, threading, time
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class JWKSCache:
+    # Caches the Cognito user pool's JSON Web Key Set so access tokens can be verified locally.
+    # The key set is refetched when it is older than `ttl`, or when a token is signed with an
+    # unknown `kid` (key rotation). Unknown-kid refetches are throttled by `min_refresh_interval`
+    # so forged tokens can't be used to hammer the JWKS endpoint. If a refetch fails the cached keys
+    # keep being served and the fetch is retried later.
+    def __init__(self, url: str, ttl: float, min_refresh_interval: float):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._fetched_at = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        # A file:// URL lets a local stand-in key set replace the Cognito endpoint.
+        if self.url.startswith("file://"):
+            with open(self.url[len("file://"):], "r") as f:
+                data = json.load(f)
+        else:
+            response = requests.get(self.url, timeout=5)
+            response.raise_for_status()
+            data = response.json()
+
+        key_set = jwt.PyJWKSet.from_dict(data)
+        return {key.key_id: key for key in key_set.keys}
+
+    def refresh(self):
+        # Fetches the key set now, raising if it can't be fetched.
+        with self._lock:
+            self._store(self._fetch())
+
+    def _store(self, keys: dict):
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        logger.info(f"Fetched {len(self._keys)} signing keys from {self.url}")
+
+    def _since(self, moment):
+        return float("inf") if moment is None else time.monotonic() - moment
+
+    def _due(self, max_age: float) -> bool:
+        # Whether the keys are older than max_age. While cached keys remain, a failed fetch
+        # isn't retried within min_refresh_interval.
+        if self._since(self._fetched_at) <= max_age:
+            return False
+        return not self._keys or self._since(self._failed_at) > self.min_refresh_interval
+
+    def _refresh(self, max_age: float):
+        with self._lock:
+            # Checked again with the lock held, so requests that queued behind a refresh don't repeat it.
+            if not self._due(max_age):
+                return
+            try:
+                keys = self._fetch()
+            except Exception as e:
+                if not self._keys:
+                    raise
+                self._failed_at = time.monotonic()
+                logger.error(f"Failed to refresh JWKS from {self.url}, keeping the {len(self._keys)} cached keys: {e}")
+                return
+            self._store(keys)
+
+    def getSigningKey(self, kid: str):
+        if self._due(self.ttl):
+            self._refresh(self.ttl)
+
+        key = self._keys.get(kid)
+        if key is None and self._due(self.min_refresh_interval):
+            logger.info(f"Unknown signing key {kid}, refreshing JWKS")
+            self._refresh(self.min_refresh_interval)
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        return key
@@ -0,0 +1,130 @@
+import asyncio, functools, logging, random, threading, time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rate limiting and transient server errors, worth another attempt.
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+def _retry_after(response) -> float:
+    # The delay a 429/503 response asks for in seconds, or None. HTTP dates aren't used by the Gemini API.
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+class LLMClient:
+    # A process-wide HTTP client for the LLM API. Requests share one keep-alive connection pool, so
+    # calls after the first skip the TCP and TLS handshakes. At most `max_concurrency` requests are in
+    # flight across all threads, a slot is only held while a request is on the wire, not while backing off.
+    # Connection errors, timeouts and RETRYABLE_STATUSES are retried with jittered exponential backoff,
+    # honouring Retry-After, and each call's latency, retries included, is observed in the metrics registry.
+    def __init__(
+        self,
+        url: str,
+        headers: dict,
+        service: str,
+        connect_timeout: float = 5,
+        read_timeout: float = 120,
+        max_concurrency: int = 8,
+        max_retries: int = 4,
+        retry_base_delay: float = 1,
+        retry_max_delay: float = 30,
+        metrics=None
+    ):
+        self.url = url
+        self.service = service
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.metrics = metrics
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        # Retries are handled here rather than by urllib3, so the backoff and the concurrency limit apply to them.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt) * random.uniform(0.5, 1)
+        requested = _retry_after(response) if response is not None else None
+        return max(delay, min(requested, self.retry_max_delay)) if requested is not None else delay
+
+    def _send(self, payload: dict):
+        with self._slots:
+            with self._lock:
+                self.in_flight += 1
+            try:
+                return self.session.post(self.url, json=payload, timeout=self.timeout)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+    def post(self, payload: dict, operation: str) -> requests.Response:
+        # Posts a JSON payload, returning the successful response or raising the last error
+        # (requests.HTTPError for an error status) once retries are exhausted.
+        started = time.perf_counter()
+        with self._lock:
+            self.calls += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                response = None
+                try:
+                    response = self._send(payload)
+                    if response.status_code not in RETRYABLE_STATUSES:
+                        response.raise_for_status()
+                        return response
+                    error = requests.HTTPError(f"{response.status_code} from {self.service}", response=response)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+
+                if attempt == self.max_retries:
+                    raise error
+                delay = self._backoff(attempt, response)
+                logger.info(f"{self.service} {operation} attempt {attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+                with self._lock:
+                    self.retries += 1
+                if self.metrics is not None:
+                    self.metrics.inc("mart_external_call_retries_total", service=self.service, operation=operation)
+                time.sleep(delay)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe(
+                    "mart_external_call_seconds", time.perf_counter() - started,
+                    service=self.service, operation=operation
+                )
+
+    async def apost(self, payload: dict, operation: str, executor=None) -> requests.Response:
+        # post() for async code, run on `executor` (the default executor if None) so the event loop isn't blocked.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(self.post, payload, operation))
+
+    def close(self):
+        self.session.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency
+            }
@@ -0,0 +1,151 @@
+import logging, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds, from fast database calls up to slow LLM requests.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HISTOGRAMS = {
+    "mart_job_stage_seconds": "Wall time of each named AI pipeline stage.",
+    "mart_job_queue_wait_seconds": "Time a job waited between becoming available and being claimed by a worker.",
+    "mart_job_duration_seconds": "Time from a job being created to it completing or failing.",
+    "mart_external_call_seconds": "Latency of calls to the embedder, Gemini and S3."
+}
+
+COUNTERS = {
+    "mart_embedding_cache_hits_total": "Texts whose embedding was served from the embedding cache.",
+    "mart_embedding_cache_misses_total": "Texts that had to be sent to the embedder.",
+    "mart_generation_cache_hits_total": "Cover letters whose Gemini response was served from the generation cache.",
+    "mart_generation_cache_misses_total": "Cover letters looked up in the generation cache and sent to Gemini.",
+    "mart_external_call_retries_total": "Attempts of external calls that failed transiently and were retried."
+}
+
+# Components on app.state whose stats() are exposed as gauges, by metric prefix.
+STATS_SOURCES = {
+    "mart_postgresql_pool": "postgresql_pool",
+    "mart_resume_cache": "resume_cache",
+    "mart_resume_store": "resume_store",
+    "mart_rate_limiter": "rate_limiter",
+    "mart_job_status": "job_status",
+    "mart_embedding_service": "embedding_service",
+    "mart_gemini": "gemini",
+    "mart_job_listing_cache": "job_listing_cache",
+    "mart_job_listing_extractor": "job_listing_extractor"
+}
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: tuple, extra: str = None) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _HistogramSeries:
+    def __init__(self, buckets: tuple):
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+class MetricsRegistry:
+    # A minimal thread-safe registry of labelled histograms and counters, rendered in the Prometheus text format.
+    # Each process (API or worker) keeps its own registry and is scraped separately.
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._series = {name: {} for name in HISTOGRAMS}
+        self._counters = {name: {} for name in COUNTERS}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] = self._counters[name].get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series[name].get(key)
+            if series is None:
+                series = self._series[name][key] = _HistogramSeries(self.buckets)
+            i = bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series.counts[i] += 1
+            series.sum += value
+            series.count += 1
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        # Observes the wall time of the with-block, whether or not it raises.
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, help_text in HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, series in self._series[name].items():
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, series.counts):
+                        cumulative += count
+                        le = _format_labels(key, f'le="{bound}"')
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    le = _format_labels(key, 'le="+Inf"')
+                    lines.append(f"{name}_bucket{le} {series.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {series.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {series.count}")
+            for name, help_text in COUNTERS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in self._counters[name].items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+def renderMetrics(app) -> str:
+    # This function renders the app's histograms followed by the numeric stats of its pools and caches as gauges.
+    lines = [app.state.metrics.render()]
+    for prefix, attr in STATS_SOURCES.items():
+        source = getattr(app.state, attr, None)
+        if source is None:
+            continue
+        try:
+            stats = source.stats()
+        except Exception as e:
+            logger.error(f"Failed to collect {attr} stats: {e}")
+            continue
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"# TYPE {prefix}_{key} gauge\n{prefix}_{key} {value}\n")
+    return "".join(lines)
+
+def startMetricsServer(app, port: int):
+    # This function serves /metrics from a background thread, for processes that don't run the API.
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = renderMetrics(app).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on port {port}")
+    return server
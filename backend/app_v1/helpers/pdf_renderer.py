@@ -0,0 +1,133 @@
+import logging, multiprocessing, os, re, threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-process render state, set up once by _warm_worker in each pool process.
+_template = None
+_stylesheets = None
+_font_config = None
+# Shared by the pool's processes, only used while they start.
+_started = None
+
+def _bullets_to_html(text: str) -> str:
+    if not text:
+        return ""
+    lines = text.splitlines()
+    out = []
+    in_list = False
+    for line in lines:
+        if re.match(r'^\s*([*\-•])\s+', line):
+            if not in_list:
+                out.append("<ul>")
+                in_list = True
+            item = re.sub(r'^\s*([*\-•])\s+', '', line)
+            out.append(f"<li>{item}</li>")
+        else:
+            if in_list:
+                out.append("</ul>")
+                in_list = False
+            if line.strip():
+                out.append(f"<p>{line}</p>")
+    if in_list:
+        out.append("</ul>")
+    return "\n".join(out)
+
+def _font_face_css(fonts_dir: str) -> str:
+    # Registers the bundled Arial faces directly with WeasyPrint, rather than relying on fontconfig lookups.
+    faces = []
+    for filename, weight in [("Arial.ttf", "normal"), ("Arial-BD.ttf", "bold")]:
+        path = os.path.abspath(os.path.join(fonts_dir, filename))
+        if os.path.exists(path):
+            faces.append(f'@font-face {{ font-family: "Arial"; font-weight: {weight}; src: url("file://{path}"); }}')
+    return "\n".join(faces)
+
+def _warm_worker(templates_dir: str, fonts_dir: str, started):
+    # Runs once per pool process: compiles letter.html, loads the fonts and renders a blank page,
+    # so WeasyPrint/Pango font setup isn't repeated for every letter.
+    global _template, _stylesheets, _font_config, _started
+    _started = started
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    env = Environment(
+        loader=FileSystemLoader(templates_dir),
+        autoescape=select_autoescape(["html", "xml"])
+    )
+    env.filters["bullets"] = _bullets_to_html
+    _template = env.get_template("letter.html")
+
+    _font_config = FontConfiguration()
+    _stylesheets = [CSS(string=_font_face_css(fonts_dir), font_config=_font_config)]
+
+    HTML(string=_template.render()).write_pdf(stylesheets=_stylesheets, font_config=_font_config)
+
+def _render(cover_letter_context: dict) -> bytes:
+    from weasyprint import HTML
+
+    html = _template.render(**cover_letter_context)
+    return HTML(string=html, base_url=".").write_pdf(stylesheets=_stylesheets, font_config=_font_config)
+
+def _ping(timeout: float):
+    # Holds this process until every pool process is running one, so no ping is served by a process already used.
+    _started.wait(timeout)
+    return os.getpid()
+
+class PdfRenderPool:
+    # A pool of pre-warmed worker processes rendering cover letter contexts to PDF bytes.
+    # WeasyPrint holds the GIL for most of a render, so separate processes let rendering scale with cores.
+    # If a pool process dies the pool is replaced by a freshly warmed one and the render retried once.
+    def __init__(self, workers: int, templates_dir: str, fonts_dir: str, timeout: float):
+        self.workers = workers
+        self.templates_dir = templates_dir
+        self.fonts_dir = fonts_dir
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = self._start()
+        self.restarts = 0
+
+    def _start(self) -> ProcessPoolExecutor:
+        # Spawned rather than forked, the parent process runs many threads.
+        context = multiprocessing.get_context("spawn")
+        started = context.Barrier(self.workers)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_warm_worker,
+            initargs=(self.templates_dir, self.fonts_dir, started)
+        )
+        # The pool only starts a process when a submit finds none idle, so one ping per worker,
+        # each waiting for the others, starts and warms every process before the first render.
+        try:
+            pings = [executor.submit(_ping, self.timeout) for _ in range(self.workers)]
+            pids = {ping.result(timeout=self.timeout) for ping in pings}
+            if len(pids) != self.workers:
+                raise RuntimeError(f"Started {len(pids)} of {self.workers} PDF render processes")
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        return executor
+
+    def _replace(self, broken: ProcessPoolExecutor):
+        # Concurrent renders that saw the same broken pool replace it once.
+        with self._lock:
+            if self._executor is broken:
+                logger.error("A PDF render process died, restarting the pool")
+                self._executor = self._start()
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, cover_letter_context: dict) -> bytes:
+        executor = self._executor
+        try:
+            return executor.submit(_render, cover_letter_context).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            self._replace(executor)
+            return self._executor.submit(_render, cover_letter_context).result(timeout=self.timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
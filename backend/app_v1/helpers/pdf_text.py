@@ -0,0 +1,121 @@
+import hashlib, logging, math, multiprocessing, os, threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from fastapi import HTTPException
+from pypdf import PdfReader
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+def hashUpload(file, max_bytes: int, salt: bytes = b"") -> str:
+    # This function hashes a seekable upload in fixed-size chunks, never holding more than one chunk in memory.
+    # It raises 413 as soon as the upload is larger than max_bytes (0 or less means unlimited) and rewinds the file.
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    while chunk := file.read(UPLOAD_READ_CHUNK):
+        size += len(chunk)
+        if 0 < max_bytes < size:
+            raise HTTPException(status_code=413, detail="File too large")
+        digest.update(chunk)
+    file.seek(0)
+    digest.update(salt)
+    return digest.hexdigest()
+
+def _not_a_pdf(e: Exception) -> HTTPException:
+    # pypdf raises its own errors for most malformed PDFs, but broken or hostile ones also surface as
+    # ValueError, KeyError, IndexError, TypeError, RecursionError and others from deep in the parser.
+    return HTTPException(status_code=400, detail=f"Not a valid PDF: {type(e).__name__}: {e}")
+
+def openPdf(file, max_pages: int) -> PdfReader:
+    # This function opens a PDF from a seekable file and checks its page count before any text is extracted.
+    try:
+        reader = PdfReader(file)
+        n_pages = len(reader.pages)
+    except Exception as e:
+        raise _not_a_pdf(e)
+
+    if n_pages > max_pages:
+        raise HTTPException(status_code=413, detail=f"PDF has {n_pages} pages, the limit is {max_pages}")
+    return reader
+
+def iterPdfPages(reader: PdfReader):
+    # This function yields each page's text in order, so only one page is being extracted at a time.
+    for page in reader.pages:
+        try:
+            text = page.extract_text()
+        except Exception as e:
+            raise _not_a_pdf(e)
+        yield text
+
+def extractPdfText(file, max_pages: int) -> str:
+    # This function extracts the text of a PDF upload, pages are joined once at the end rather than concatenated one by one.
+    return "".join(iterPdfPages(openPdf(file, max_pages)))
+
+def _extract_page_range(data: bytes, start: int, stop: int) -> str:
+    # Runs in a pool process: parses the PDF and extracts pages [start, stop).
+    reader = PdfReader(BytesIO(data))
+    return "".join(reader.pages[i].extract_text() for i in range(start, stop))
+
+def _ping():
+    return os.getpid()
+
+class PdfTextPool:
+    # A process pool extracting the text of large PDFs in parallel page ranges, reassembled in page order.
+    # pypdf's extract_text is pure Python and holds the GIL, so threads can't spread one PDF across cores.
+    # PDFs with fewer than `min_pages` pages are extracted serially, where the cost of sending the PDF
+    # to other processes and parsing it once in each would outweigh the gain. If a pool process dies,
+    # e.g. killed for its memory use by a hostile PDF, the pool is replaced and that PDF is extracted serially.
+    def __init__(self, workers: int, min_pages: int, pages_per_range: int):
+        self.workers = workers
+        self.min_pages = min_pages
+        self.pages_per_range = pages_per_range
+        self._lock = threading.Lock()
+        self._executor = self._start()
+        self.restarts = 0
+
+    def _start(self) -> ProcessPoolExecutor:
+        # Spawned rather than forked, the parent process runs many threads.
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        executor.submit(_ping).result()
+        return executor
+
+    def _replace(self, broken: ProcessPoolExecutor):
+        # Concurrent requests that saw the same broken pool replace it once.
+        with self._lock:
+            if self._executor is broken:
+                logger.error("A PDF text extraction process died, restarting the pool")
+                self._executor = self._start()
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, file, max_pages: int) -> str:
+        reader = openPdf(file, max_pages)
+        n_pages = len(reader.pages)
+        if n_pages < self.min_pages:
+            return "".join(iterPdfPages(reader))
+
+        file.seek(0)
+        data = file.read()
+        n_ranges = min(self.workers, math.ceil(n_pages / self.pages_per_range))
+        step = math.ceil(n_pages / n_ranges)
+        executor = self._executor
+        try:
+            futures = [
+                executor.submit(_extract_page_range, data, start, min(start + step, n_pages))
+                for start in range(0, n_pages, step)
+            ]
+            return "".join(future.result() for future in futures)
+        except BrokenProcessPool:
+            self._replace(executor)
+            return "".join(iterPdfPages(reader))
+        except Exception as e:
+            # Raised by pypdf in a pool process while extracting a page range.
+            raise _not_a_pdf(e)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
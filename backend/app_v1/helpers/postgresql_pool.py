@@ -0,0 +1,107 @@
+import psycopg2, logging, threading, time
+from contextlib import contextmanager
+from psycopg2.pool import ThreadedConnectionPool
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(Exception):
+    pass
+
+class PostgreSQLPool:
+    # A thread-safe PostgreSQL connection pool which blocks callers until a connection is free.
+    # psycopg2's ThreadedConnectionPool raises as soon as it is exhausted, so a semaphore sized
+    # to maxconn is used to queue callers (up to `timeout` seconds) and to measure pool wait.
+    def __init__(self, minconn: int, maxconn: int, timeout: float, **connect_kwargs):
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+
+        self.checkouts = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def getconn(self):
+        # Waits for a free slot, recording how long the caller was blocked.
+        started = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.timeout)
+        waited = time.monotonic() - started
+
+        with self._lock:
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if not acquired:
+                self.timeouts += 1
+
+        if not acquired:
+            raise PoolTimeout(f"Timed out after {self.timeout}s waiting for a PostgreSQL connection")
+
+        try:
+            conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+        return conn
+
+    def putconn(self, conn, close=False):
+        # Returns a connection to the pool, psycopg2 rolls back any transaction left open.
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max
+            }
+
+@contextmanager
+def getConnection(app):
+    # Checks out a connection for a single operation and always returns it to the pool.
+    # If the operation raises, the transaction is rolled back before the exception propagates.
+    pool = app.state.postgresql_pool
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except Exception:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            # The connection itself is unusable (e.g. server closed it), don't hand it out again.
+            broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken or conn.closed != 0)
+
+def getPoolStats(app):
+    # Returns checkout and wait statistics for the PostgreSQL pool.
+    return app.state.postgresql_pool.stats()
+
+def setStatementTimeout(cur, timeout):
+    # This function makes PostgreSQL cancel the current transaction's statements after timeout seconds (None for no limit),
+    # so a write that takes too long is rolled back rather than committed after its caller gave up.
+    if timeout is not None:
+        cur.execute("SET LOCAL statement_timeout = %s;", (max(1, int(timeout * 1000)),))
@@ -0,0 +1,89 @@
+import logging, threading, time
+from collections import deque
+from app_v1.helpers.ttl_cache import TTLCache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 3600
+
+class _UserWindow:
+    def __init__(self):
+        self.baseline = 0
+        self.reconciled_at = None
+        self.hits = deque()
+
+class SlidingWindowRateLimiter:
+    # An in-process, per-user sliding window counter of jobs started in the past hour.
+    # Each user's count is seeded from the database (`count_fn`, a COUNT(*) over AIJobs) and then
+    # kept up to date locally, so most checks never touch the database. The count is re-seeded
+    # every `reconcile_seconds` (which also ages out jobs older than the window and picks up jobs
+    # started on other API nodes), or before rejecting a user if the seed is older than `recheck_seconds`.
+    def __init__(self, count_fn, reconcile_seconds: float, recheck_seconds: float, max_users: int):
+        self._count_fn = count_fn
+        self.reconcile_seconds = reconcile_seconds
+        self.recheck_seconds = recheck_seconds
+        self._users = TTLCache(max_users, WINDOW_SECONDS)
+        self._lock = threading.Lock()
+
+        self.checks = 0
+        self.reconciles = 0
+        self.rejections = 0
+
+    def _reconcile(self, user_uuid, window):
+        started = time.monotonic()
+        n_recent_jobs = self._count_fn(user_uuid)
+        with self._lock:
+            self.reconciles += 1
+            if n_recent_jobs is None:
+                # The count failed, keep the local estimate rather than resetting the user to zero.
+                if window.reconciled_at is None:
+                    window.reconciled_at = time.monotonic()
+                return
+            window.baseline = n_recent_jobs
+            window.reconciled_at = started
+            # Hits recorded while the count was running may not be in it yet, keep those.
+            while window.hits and window.hits[0] < started:
+                window.hits.popleft()
+
+    def _age(self, window):
+        return float("inf") if window.reconciled_at is None else time.monotonic() - window.reconciled_at
+
+    def _count(self, window):
+        return window.baseline + len(window.hits)
+
+    def tryAcquire(self, user_uuid, limit: int):
+        # Returns True and records a hit if the user is below `limit` jobs in the window, otherwise returns False.
+        with self._lock:
+            self.checks += 1
+            window = self._users.get(user_uuid)
+            if window is None:
+                window = _UserWindow()
+            self._users.set(user_uuid, window)
+
+        if self._age(window) > self.reconcile_seconds:
+            self._reconcile(user_uuid, window)
+
+        with self._lock:
+            over_limit = self._count(window) >= limit
+
+        if over_limit and self._age(window) > self.recheck_seconds:
+            # Jobs may have aged out of the window since the last count, check before rejecting.
+            self._reconcile(user_uuid, window)
+
+        with self._lock:
+            if self._count(window) >= limit:
+                self.rejections += 1
+                return False
+            window.hits.append(time.monotonic())
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "checks": self.checks,
+                "reconciles": self.reconciles,
+                "rejections": self.rejections
+            }
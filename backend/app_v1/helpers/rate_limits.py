@@ -1,7 +1,7 @@
 import psycopg2, logging, os
 from fastapi import Request, HTTPException
 from app_v1.helpers.cognito_auth import authenticateSession
-from app_v1.helpers.ai_jobs import getRecentJobs
+from app_v1.helpers.postgresql_pool import getConnection
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -10,19 +10,19 @@ logger = logging.getLogger(__name__)
 def checkRateLimitsTableExists(app):
     logger.info("Checking Rate Limits Table...")
     try:
-        cur = app.state.postgresql_db.cursor()
-        check_table_query = """
-            SELECT EXISTS (
-                SELECT 1
-                FROM   pg_tables
-                WHERE  schemaname = 'public'
-                AND    tablename = 'usersubscriptionlevels'
-            );
-            """
-        cur.execute(check_table_query)
-        
-        # Fetch the result and log it
-        result = cur.fetchone()
+        with getConnection(app) as conn, conn.cursor() as cur:
+            check_table_query = """
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM   pg_tables
+                    WHERE  schemaname = 'public'
+                    AND    tablename = 'usersubscriptionlevels'
+                );
+                """
+            cur.execute(check_table_query)
+            
+            # Fetch the result and log it
+            result = cur.fetchone()
         logger.debug(f"Query Result: {result}")
         
         if not result or len(result) == 0:
@@ -35,11 +35,8 @@ def checkRateLimitsTableExists(app):
             logger.info("Rate Limits Table doesn't exist")
             return False
     except Exception as e:
-        app.state.postgresql_db.rollback()
         logger.error(f"Error checking Rate Limits Table: {e}")
         return False
-    finally:
-        cur.close()  # Ensure the cursor is closed
 
     logger.info("Rate Limits Table does exist")
     return True
@@ -47,35 +44,33 @@ def checkRateLimitsTableExists(app):
 def createDefaultRateLimitsTable(app):
     logger.info("Creating Rate Limits Table...")
     try:
-        cur = app.state.postgresql_db.cursor()
-        create_table_query = """
-            CREATE TABLE UserSubscriptionLevels (
-                SubscriptionLevel VARCHAR(20) PRIMARY KEY,
-                Description VARCHAR(100),
-                MaxAPIRequestsPerHour INT,
-                MaxFileUploadKB INT
-            );
-            """
-
-        cur.execute(create_table_query)
-
-        insert_data_query = """
-            INSERT INTO UserSubscriptionLevels (SubscriptionLevel, Description, MaxAPIRequestsPerHour, MaxFileUploadKB)
-            VALUES 
-            ('Basic', 'Basic subscription level with limited features.', 5, 100),
-            ('Premium', 'Premium subscription level with enhanced features.', 100, 500),
-            ('Admin', 'Administrator access with no limits.', -1, -1);
-            """
-        
-        cur.execute(insert_data_query)
-        app.state.postgresql_db.commit()
+        with getConnection(app) as conn, conn.cursor() as cur:
+            create_table_query = """
+                CREATE TABLE UserSubscriptionLevels (
+                    SubscriptionLevel VARCHAR(20) PRIMARY KEY,
+                    Description VARCHAR(100),
+                    MaxAPIRequestsPerHour INT,
+                    MaxFileUploadKB INT
+                );
+                """
+
+            cur.execute(create_table_query)
+
+            insert_data_query = """
+                INSERT INTO UserSubscriptionLevels (SubscriptionLevel, Description, MaxAPIRequestsPerHour, MaxFileUploadKB)
+                VALUES 
+                ('Basic', 'Basic subscription level with limited features.', 5, 100),
+                ('Premium', 'Premium subscription level with enhanced features.', 100, 500),
+                ('Admin', 'Administrator access with no limits.', -1, -1);
+                """
+            
+            cur.execute(insert_data_query)
+            conn.commit()
 
         logger.info("Created Default UserSubscriptionLevels successfully")
     except psycopg2.errors.DuplicateTable as e:
-        app.state.postgresql_db.rollback()
         logger.warning(f"Table 'UserSubscriptionLevels' already exists: {e}")
     except Exception as e:
-        app.state.postgresql_db.rollback()
         logger.error(f"An error occured when creating UserSubscriptionLevels: {e}")
         return False
     return True
@@ -97,47 +92,56 @@ def initialiseRateLimitsTable(app):
 def getValidSubscriptionLevels(app):
     logger.info("Fetching valid Subscription Levels...")
     try:
-        cur = app.state.postgresql_db.cursor()
-        
-        query = """
-            SELECT SubscriptionLevel FROM UserSubscriptionLevels;
-        """
-        
-        cur.execute(query)
-        subscription_levels = [row[0] for row in cur.fetchall()]
+        with getConnection(app) as conn, conn.cursor() as cur:
+            query = """
+                SELECT SubscriptionLevel FROM UserSubscriptionLevels;
+            """
+            
+            cur.execute(query)
+            subscription_levels = [row[0] for row in cur.fetchall()]
         
         logger.info(f"Found {len(subscription_levels)} valid subscription levels.")
         return subscription_levels
     except Exception as e:
-        app.state.postgresql_db.rollback()
         logger.error(f"Error fetching Subscription Levels: {e}")
         return []
 
+def invalidateSubscriptionCache(app, subscription_level=None):
+    # Drops one (or every) cached subscription level, e.g. after UserSubscriptionLevels is edited.
+    if subscription_level is None:
+        app.state.subscription_cache.clear()
+    else:
+        app.state.subscription_cache.pop(subscription_level)
+
 def getSubscription(app, subscription_level):
+    subscription = app.state.subscription_cache.get(subscription_level)
+    if subscription is not None:
+        return dict(subscription)
+
     logger.info(f"Fetching user subscription: {subscription_level}")
     try:
-        cur = app.state.postgresql_db.cursor()
-        
-        query = """
-            SELECT * FROM UserSubscriptionLevels WHERE SubscriptionLevel = %s;
-        """
-        
-        cur.execute(query, (subscription_level, ))
-        row = cur.fetchone()
+        with getConnection(app) as conn, conn.cursor() as cur:
+            query = """
+                SELECT * FROM UserSubscriptionLevels WHERE SubscriptionLevel = %s;
+            """
+            
+            cur.execute(query, (subscription_level, ))
+            row = cur.fetchone()
         
         if row is None:
             logger.error(f"No details found for subscription level: {subscription_level}")
             return None
 
         logger.info(f"Details found for subscription level: {subscription_level}")
-        return {
+        subscription = {
             "SubscriptionLevel": row[0], 
             "Description": row[1], 
             "MaxAPIRequestsPerHour": row[2], 
             "MaxFileUploadKB": row[3]
         }
+        app.state.subscription_cache.set(subscription_level, subscription)
+        return dict(subscription)
     except Exception as e:
-        app.state.postgresql_db.rollback()
         logger.error(f"Error fetching Subscription Levels: {e}")
         return {}
 
@@ -162,14 +166,13 @@ def authenticateSessionAndRateLimit(request: Request):
         if attr['Name'] == "custom:subscriptionLevel":
             subscription = getSubscription(request.app, attr['Value'])
 
-    if subscription == {}:
+    if not subscription:
         raise HTTPException(status_code=401, detail=f"authenticateSessionAndRateLimit: No custom:subscriptionLevel in user_data")
     logger.info(f"Got subscription: {subscription}")
 
-    n_jobs_by_user = len(getRecentJobs(request.app, uuid))
-    logger.info(f"Got number of recent jobs: {n_jobs_by_user}")
-
-    if n_jobs_by_user >= subscription['MaxAPIRequestsPerHour'] and subscription['MaxAPIRequestsPerHour'] > 0:
+    if subscription['MaxAPIRequestsPerHour'] > 0 and not request.app.state.rate_limiter.tryAcquire(uuid, subscription['MaxAPIRequestsPerHour']):
         raise HTTPException(status_code=429, detail=f"User has used their subscription rate limit of {subscription['MaxAPIRequestsPerHour']} API requests per hour")
 
+    # Endpoints read the subscription from here, so they don't look it up again on the event loop.
+    user_data["Subscription"] = subscription
     return user_data
\ No newline at end of file
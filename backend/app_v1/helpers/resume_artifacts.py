@@ -0,0 +1,101 @@
+import psycopg2, logging
+from datetime import datetime
+from app_v1.helpers.postgresql_pool import getConnection, setStatementTimeout
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def createResumeArtifactsTables(app):
+    # This function creates the tables used to deduplicate resume uploads, it is safe to run on every startup.
+    # ResumeArtifacts maps a user's upload fingerprint to the job whose S3 artifacts hold its index.
+    # ResumeAliases maps the file ids of deduplicated uploads to those artifacts.
+    logger.info("Creating Resume Artifacts Tables...")
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS ResumeArtifacts (
+                    CreatedBy UUID,
+                    Fingerprint CHAR(64),
+                    ArtifactID UUID NOT NULL,
+                    Created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (CreatedBy, Fingerprint)
+                );
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS ResumeAliases (
+                    FileID UUID PRIMARY KEY,
+                    ArtifactID UUID NOT NULL
+                );
+            """)
+            conn.commit()
+    except Exception as e:
+        logger.error(f"An error occurred when creating Resume Artifacts Tables: {e}")
+        return False
+    return True
+
+def findResumeArtifact(app, user_uuid, fingerprint):
+    # This function returns the artifact id of a resume the user has already indexed with this fingerprint, or None.
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT ArtifactID
+                FROM ResumeArtifacts
+                WHERE CreatedBy = %s AND Fingerprint = %s;
+            """, (user_uuid, fingerprint))
+            row = cur.fetchone()
+        return str(row[0]) if row else None
+    except Exception as e:
+        # A failed lookup only costs a re-index, so the upload carries on.
+        logger.error(f"Error looking up resume artifact: {e}")
+        return None
+
+def recordResumeArtifact(app, user_uuid, fingerprint, artifact_id):
+    # This function records the artifacts of a newly indexed resume, so later identical uploads can reuse them.
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO ResumeArtifacts (CreatedBy, Fingerprint, ArtifactID)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (CreatedBy, Fingerprint) DO NOTHING;
+            """, (user_uuid, fingerprint, artifact_id))
+            conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error recording resume artifact {artifact_id}: {e}")
+        return False
+
+def createDedupedIndexJob(app, job_uuid, user_uuid, artifact_id, statement_timeout=None):
+    # This function records a completed IndexResume job whose file id is an alias for existing artifacts.
+    # The job and its alias are written in one transaction, so the job id is usable as soon as it is returned.
+    logger.info(f"Reusing resume artifacts {artifact_id} for Job UUID: {job_uuid}")
+    try:
+        with getConnection(app) as conn, conn.cursor() as cur:
+            setStatementTimeout(cur, statement_timeout)
+            now = datetime.utcnow()
+            cur.execute("""
+                INSERT INTO AIJobs (JobID, CreatedBy, JobType, Status, Created, Finished, QueueState)
+                VALUES (%s, %s, 'IndexResume', 'Completed', %s, %s, 'Done');
+            """, (job_uuid, user_uuid, now, now))
+            cur.execute("""
+                INSERT INTO ResumeAliases (FileID, ArtifactID)
+                VALUES (%s, %s);
+            """, (job_uuid, artifact_id))
+            conn.commit()
+        return True
+    except psycopg2.DatabaseError as e:
+        logger.error(f"Database error while creating deduplicated AI job: {e}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while creating deduplicated AI job: {e}")
+    return False
+
+def resolveResumeArtifact(app, file_id):
+    # This function returns the artifact id holding an indexed resume's files, which is the file id itself unless it was deduplicated.
+    with getConnection(app) as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT ArtifactID
+            FROM ResumeAliases
+            WHERE FileID = %s;
+        """, (file_id,))
+        row = cur.fetchone()
+    return str(row[0]) if row else file_id
@@ -0,0 +1,120 @@
+import logging, threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _estimate_bytes(index, chunks):
+    # Memory-mapped indexes report their own (small) heap use, their vectors and chunks stay in the page cache.
+    if hasattr(index, "heap_bytes"):
+        return index.heap_bytes
+    # FAISS indexes hold ntotal float32 vectors, plus an HNSW graph's int32 neighbour lists.
+    # Chunks are counted by their UTF-8 size.
+    graph_bytes = index.hnsw.neighbors.size() * 4 if hasattr(index, "hnsw") else 0
+    return index.ntotal * index.d * 4 + graph_bytes + sum(len(chunk.encode("utf-8")) for chunk in chunks)
+
+class ResumeIndexCache:
+    # A process-wide LRU cache of deserialized (index, chunks) pairs keyed by file_id.
+    # It is bounded by both entry count and estimated bytes, and concurrent loads of
+    # the same file_id share a single fetch.
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def getOrLoad(self, file_id: str, loader):
+        # Returns the cached (index, chunks) for file_id, calling loader() at most once on a miss.
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is not None:
+                self._entries.move_to_end(file_id)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+            future = self._loading.get(file_id)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._loading[file_id] = future
+
+        if not owner:
+            # Another request is already fetching this resume, wait for its result.
+            return future.result()
+
+        try:
+            value = loader()
+            self._insert(file_id, value)
+        except BaseException as e:
+            # Waiters get the error too, and the next request for file_id loads it afresh.
+            with self._lock:
+                self._loading.pop(file_id, None)
+            future.set_exception(e)
+            raise
+
+        future.set_result(value)
+        return value
+
+    def _insert(self, file_id, value):
+        # Removes file_id from the loads in progress once its value is cached, or found too large to cache.
+        size = _estimate_bytes(*value)
+        with self._lock:
+            del self._loading[file_id]
+            if size > self.max_bytes:
+                logger.info(f"Resume {file_id} ({size} bytes) is larger than the cache, not caching it")
+                return
+
+            self._entries[file_id] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        # Called with the lock held.
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def peek(self, file_id: str):
+        # Returns the cached value for file_id, or None, without loading it or counting a hit.
+        with self._lock:
+            entry = self._entries.get(file_id)
+            return entry[0] if entry is not None else None
+
+    def reweigh(self, file_id: str):
+        # Re-estimates the size of an entry that grew in place, such as a resume collection gaining a resume.
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None:
+                return
+            size = _estimate_bytes(*entry[0])
+            self._entries[file_id] = (entry[0], size)
+            self._bytes += size - entry[1]
+            self._evict()
+
+    def pop(self, file_id: str):
+        with self._lock:
+            entry = self._entries.pop(file_id, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
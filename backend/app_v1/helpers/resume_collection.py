@@ -0,0 +1,128 @@
+import logging, threading
+import numpy as np
+from app_v1.helpers.postgresql_pool import getConnection
+from app_v1.helpers.vector_index import chooseIndex, buildIndex
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def listUserResumes(app, user_uuid) -> list:
+    # This function returns the artifact ids of every resume the user has indexed, oldest first.
+    # Deduplicated uploads resolve to the artifacts they share, so each artifact is listed once.
+    with getConnection(app) as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT COALESCE(a.ArtifactID, j.JobID) AS ArtifactID
+            FROM AIJobs j
+            LEFT JOIN ResumeAliases a ON a.FileID = j.JobID
+            WHERE j.CreatedBy = %s AND j.JobType = 'IndexResume' AND j.Status = 'Completed'
+            GROUP BY 1
+            ORDER BY MIN(j.Created);
+        """, (user_uuid,))
+        rows = cur.fetchall()
+    return [str(row[0]) for row in rows]
+
+def _collection_key(user_uuid) -> str:
+    # Resume cache key of a user's collection, file ids are UUIDs so it can't collide with one.
+    return f"user:{user_uuid}"
+
+class ResumeCollection:
+    # All of a user's indexed resumes merged into one inner-product index, searched like a single resume's.
+    # The index is an IndexIDMap whose ids are positions in `chunks`, and `owners` maps each id to the
+    # artifact id of the resume the chunk came from. Resumes are added incrementally, the index kind is
+    # chosen for the collection's size when it is built.
+    def __init__(self, artifacts: list):
+        # artifacts is a list of (artifact_id, vectors, chunks) with L2-normalized vectors.
+        vectors = np.concatenate([np.asarray(vecs, dtype="float32") for _, vecs, _ in artifacts])
+        self.kind, param = chooseIndex(len(vectors))
+        self.index = buildIndex(vectors, self.kind, param, ids=np.arange(len(vectors)))
+        self.d = vectors.shape[1]
+        # An HNSW graph holds about 2M int32 neighbours per vector.
+        self._graph_bytes = 2 * param * 4 if self.kind == "hnsw" else 0
+        self.chunks = []
+        self.owners = []
+        self.members = set()
+        self.heap_bytes = 0
+        self._lock = threading.Lock()
+
+        for artifact_id, vecs, chunks in artifacts:
+            self._track(artifact_id, len(vecs), chunks)
+
+    def _track(self, artifact_id: str, n: int, chunks):
+        self.chunks.extend(chunks)
+        self.owners.extend([artifact_id] * n)
+        self.members.add(artifact_id)
+        # float32 vectors, the int64 id map, the graph and the chunks' UTF-8 bytes.
+        self.heap_bytes += n * (self.d * 4 + 8 + self._graph_bytes) + sum(len(chunk.encode("utf-8")) for chunk in chunks)
+
+    @property
+    def ntotal(self):
+        return self.index.ntotal
+
+    def add(self, artifact_id: str, vectors: np.ndarray, chunks):
+        # Adds one resume's vectors and chunks, a resume already in the collection is skipped.
+        with self._lock:
+            if artifact_id in self.members:
+                return False
+            start = len(self.chunks)
+            x = np.ascontiguousarray(vectors, dtype="float32")
+            self.index.add_with_ids(x, np.arange(start, start + len(x), dtype="int64"))
+            self._track(artifact_id, len(x), list(chunks))
+            return True
+
+    def search(self, q: np.ndarray, k: int):
+        # FAISS indexes aren't safe to search while vectors are being added.
+        with self._lock:
+            return self.index.search(q, k)
+
+def getUserCollection(app, user_uuid, open_artifact) -> ResumeCollection:
+    # This function returns the user's resume collection, built on first use and kept in the resume cache.
+    # open_artifact(artifact_id) returns a resume's ArtifactView. A cached collection is brought up to date
+    # by adding only the resumes indexed since, e.g. by another process, and rebuilt once it has grown
+    # enough to need a different index kind.
+    artifact_ids = listUserResumes(app, user_uuid)
+    if not artifact_ids:
+        return None
+
+    key = _collection_key(user_uuid)
+    resume_cache = app.state.resume_cache
+
+    def load():
+        artifacts = []
+        for artifact_id in artifact_ids:
+            artifact = open_artifact(artifact_id)
+            artifacts.append((artifact_id, artifact.vectors, list(artifact.chunks)))
+        collection = ResumeCollection(artifacts)
+        logger.info(f"Built a {collection.kind} collection of {len(artifacts)} resumes ({collection.ntotal} chunks) for {user_uuid}")
+        return collection, collection.chunks
+
+    collection, _ = resume_cache.getOrLoad(key, load)
+    missing = [artifact_id for artifact_id in artifact_ids if artifact_id not in collection.members]
+    if not missing:
+        return collection
+
+    added = [open_artifact(artifact_id) for artifact_id in missing]
+    if chooseIndex(collection.ntotal + sum(len(a.vectors) for a in added))[0] != collection.kind:
+        resume_cache.pop(key)
+        collection, _ = resume_cache.getOrLoad(key, load)
+        return collection
+
+    for artifact_id, artifact in zip(missing, added):
+        collection.add(artifact_id, artifact.vectors, artifact.chunks)
+    resume_cache.reweigh(key)
+    return collection
+
+def addToUserCollection(app, user_uuid, artifact_id, artifact):
+    # This function adds a newly indexed resume to the user's collection if this process has it cached,
+    # so the next "all resumes" search doesn't need to fetch it. Other processes catch up on their next use.
+    key = _collection_key(user_uuid)
+    cached = app.state.resume_cache.peek(key)
+    if cached is None:
+        return False
+    collection = cached[0]
+    if chooseIndex(collection.ntotal + len(artifact.vectors))[0] != collection.kind:
+        app.state.resume_cache.pop(key)
+        return False
+    added = collection.add(artifact_id, artifact.vectors, artifact.chunks)
+    app.state.resume_cache.reweigh(key)
+    return added
@@ -0,0 +1,129 @@
+import logging, mmap, os, threading, uuid
+import numpy as np
+from app_v1.helpers.artifact_format import ArtifactView
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows of a float16 artifact converted to float32 at a time while searching.
+SEARCH_BLOCK_ROWS = 4096
+
+class MappedFlatIndex:
+    # An exact inner-product index over the vectors of a memory-mapped artifact, answering search() like
+    # faiss.IndexFlatIP. The vectors are L2-normalized, so scores are cosine similarities, highest first.
+    # The vectors stay in the page cache. float32 vectors are searched in place, float16 vectors are
+    # converted SEARCH_BLOCK_ROWS rows at a time, so a search never copies the whole matrix onto the heap.
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+        self.ntotal, self.d = vectors.shape
+        self.heap_bytes = 0
+
+    def search(self, q: np.ndarray, k: int):
+        # Returns (scores, ids) of shape (len(q), k), padded with -1 ids when k > ntotal, as FAISS does.
+        q = np.asarray(q, dtype="float32")
+        if self.vectors.dtype == np.float32:
+            scores = q @ self.vectors.T
+        else:
+            scores = np.empty((len(q), self.ntotal), dtype="float32")
+            for start in range(0, self.ntotal, SEARCH_BLOCK_ROWS):
+                block = self.vectors[start:start + SEARCH_BLOCK_ROWS].astype("float32")
+                scores[:, start:start + len(block)] = q @ block.T
+        n = min(k, self.ntotal)
+
+        ids = np.argpartition(-scores, n - 1, axis=1)[:, :n] if n < self.ntotal else np.tile(np.arange(n), (len(q), 1))
+        top = np.take_along_axis(scores, ids, axis=1)
+        order = np.argsort(-top, axis=1)
+        ids = np.take_along_axis(ids, order, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+
+        if n < k:
+            ids = np.pad(ids, ((0, 0), (0, k - n)), constant_values=-1)
+            top = np.pad(top, ((0, 0), (0, k - n)), constant_values=-np.inf)
+        return top.astype("float32"), ids.astype("int64")
+
+class LocalResumeStore:
+    # Resume artifacts kept in a local directory and opened with mmap. Every worker process on a host
+    # that shares the directory maps the same files, so each hot resume is held once, in the OS page
+    # cache, rather than once per process. Files are written atomically, and the least recently opened
+    # are deleted once the directory exceeds `max_bytes`; processes that still map a deleted file keep
+    # a valid mapping until they drop it.
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, file_id: str) -> str:
+        # file_id is parsed as a UUID so it can't name a path outside the directory.
+        return os.path.join(self.directory, f"{uuid.UUID(file_id)}.mart")
+
+    def _map(self, path: str):
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def open(self, file_id: str, fetch):
+        # Returns an ArtifactView over the mapped artifact for file_id, calling fetch() for its bytes if it isn't on disk.
+        path = self._path(file_id)
+        try:
+            mapped = self._map(path)
+            # The modification time records recency of use for eviction.
+            os.utime(path)
+            with self._lock:
+                self.hits += 1
+            return ArtifactView(mapped)
+        except FileNotFoundError:
+            pass
+
+        data = fetch()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        # Mapped before it is renamed into place, so a concurrent eviction can't remove it first.
+        mapped = self._map(tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.misses += 1
+        self._evict(keep=path)
+        return ArtifactView(mapped)
+
+    def _evict(self, keep: str):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".mart"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, entry.path, stat.st_size))
+            total += stat.st_size
+
+        entries.sort()
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+            except FileNotFoundError:
+                # Another process evicted it first.
+                total -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,65 @@
+import faiss, logging, math, os
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "auto" searches small vector sets exactly and switches to ANN_INDEX_TYPE at ANN_MIN_VECTORS,
+# "flat", "hnsw" or "ivf" force one kind of index for every set.
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "auto")
+ANN_INDEX_TYPE = os.getenv("ANN_INDEX_TYPE", "hnsw")
+ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "4096"))
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+# FAISS wants roughly 39 training vectors per IVF list, fewer lists than that are forced flat.
+_IVF_MIN_POINTS_PER_LIST = 39
+
+def _ivf_nlist(n_vectors: int) -> int:
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // _IVF_MIN_POINTS_PER_LIST))
+
+def chooseIndex(n_vectors: int, index_type: str = None) -> tuple:
+    # This function picks the index for a set of n_vectors normalized vectors, returning (kind, param)
+    # as recorded in a .mart artifact. The parameter is HNSW's M or IVF's list count, 0 for flat.
+    index_type = index_type or VECTOR_INDEX_TYPE
+    if index_type == "auto":
+        index_type = ANN_INDEX_TYPE if n_vectors >= ANN_MIN_VECTORS else "flat"
+
+    if index_type == "hnsw":
+        return "hnsw", HNSW_M
+    if index_type == "ivf" and _ivf_nlist(n_vectors) > 1:
+        return "ivf", _ivf_nlist(n_vectors)
+    return "flat", 0
+
+def buildIndex(vectors: np.ndarray, kind: str = "flat", param: int = 0, ids: np.ndarray = None):
+    # This function builds an inner-product FAISS index over L2-normalized vectors, so search() returns
+    # cosine similarities, highest first. Search-time parameters come from the environment, not the artifact.
+    # With ids the index is wrapped in an IndexIDMap, search() returns those ids and more vectors can be
+    # added later with add_with_ids.
+    x = np.ascontiguousarray(vectors, dtype="float32")
+    d = x.shape[1]
+
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(d, param or HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif kind == "ivf":
+        nlist = min(param or _ivf_nlist(len(x)), len(x))
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(x)
+        index.nprobe = min(IVF_NPROBE, nlist)
+    else:
+        if kind != "flat":
+            logger.error(f"Unknown index kind {kind}, searching exactly")
+        index = faiss.IndexFlatIP(d)
+
+    if ids is None:
+        index.add(x)
+        return index
+
+    mapped = faiss.IndexIDMap(index)
+    mapped.add_with_ids(x, np.ascontiguousarray(ids, dtype="int64"))
+    return mapped
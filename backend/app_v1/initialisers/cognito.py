@@ -1,13 +1,37 @@
-import logging, boto3
+import logging, os, boto3
+from app_v1.helpers.jwks_cache import JWKSCache
+from app_v1.helpers.ttl_cache import TTLCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+COGNITO_REGION = os.getenv("COGNITO_REGION", "ap-southeast-2")
+COGNITO_USER_POOL_ID = os.getenv("COGNITO_USER_POOL_ID")
+COGNITO_JWKS_URL = os.getenv(
+    "COGNITO_JWKS_URL",
+    f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
+)
+COGNITO_JWKS_TTL = float(os.getenv("COGNITO_JWKS_TTL", "3600"))
+COGNITO_JWKS_MIN_REFRESH = float(os.getenv("COGNITO_JWKS_MIN_REFRESH", "60"))
+USER_ATTRIBUTES_CACHE_TTL = float(os.getenv("USER_ATTRIBUTES_CACHE_TTL", "300"))
+USER_ATTRIBUTES_CACHE_SIZE = int(os.getenv("USER_ATTRIBUTES_CACHE_SIZE", "10000"))
+
 def initialiseCognito(app):
     logger.info("Setting up Cognito client for user authentication...")
     try:
-        app.state.cognito = boto3.client("cognito-idp", region_name="ap-southeast-2")
+        app.state.cognito = boto3.client("cognito-idp", region_name=COGNITO_REGION)
     except Exception as e:
         logger.error(f"Failed to initialize Cognito client: {e}")
         return False
+
+    logger.info("Setting up JWKS and user attribute caches for local token verification...")
+    app.state.jwks = JWKSCache(COGNITO_JWKS_URL, COGNITO_JWKS_TTL, COGNITO_JWKS_MIN_REFRESH)
+    app.state.user_attributes_cache = TTLCache(USER_ATTRIBUTES_CACHE_SIZE, USER_ATTRIBUTES_CACHE_TTL)
+    # Entries record when a user's attributes last changed, so older cached attributes are ignored.
+    app.state.user_attributes_invalidated = TTLCache(USER_ATTRIBUTES_CACHE_SIZE, USER_ATTRIBUTES_CACHE_TTL)
+    try:
+        app.state.jwks.refresh()
+    except Exception as e:
+        # Keys are fetched again on the first request, so this isn't fatal.
+        logger.warning(f"Failed to prefetch Cognito JWKS: {e}")
     return True
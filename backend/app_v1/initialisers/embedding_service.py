@@ -0,0 +1,29 @@
+import logging, os
+from app_v1.helpers.embedding_service import EmbeddingService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "10"))
+EMBED_MAX_IN_FLIGHT = int(os.getenv("EMBED_MAX_IN_FLIGHT", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "3"))
+EMBED_RETRY_BASE_DELAY = float(os.getenv("EMBED_RETRY_BASE_DELAY", "0.5"))
+
+def initialiseEmbeddingService(app):
+    # Wraps app.state.embedder, so it must run after initialiseOpenAI.
+    logger.info(f"Starting embedding service ({EMBED_BATCH_SIZE} texts per request, {EMBED_MAX_IN_FLIGHT} in flight)...")
+    try:
+        app.state.embedding_service = EmbeddingService(
+            app.state.embedder,
+            max_batch=EMBED_BATCH_SIZE,
+            batch_window=EMBED_BATCH_WINDOW_MS / 1000,
+            max_in_flight=EMBED_MAX_IN_FLIGHT,
+            max_retries=EMBED_MAX_RETRIES,
+            retry_base_delay=EMBED_RETRY_BASE_DELAY,
+            metrics=app.state.metrics
+        )
+    except Exception as e:
+        logger.error(f"Failed to start embedding service: {e}")
+        return False
+    return True
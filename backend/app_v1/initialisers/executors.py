@@ -0,0 +1,22 @@
+import logging, os
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IO_EXECUTOR_WORKERS = int(os.getenv("IO_EXECUTOR_WORKERS", "64"))
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(os.cpu_count() or 2)))
+
+def initialiseExecutors(app):
+    logger.info("Setting up executors for blocking request work...")
+    try:
+        app.state.executors = {
+            # Network bound work: S3 downloads, job listing fetches.
+            "io": ThreadPoolExecutor(max_workers=IO_EXECUTOR_WORKERS, thread_name_prefix="io"),
+            # CPU bound work: PDF parsing.
+            "cpu": ThreadPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu")
+        }
+    except Exception as e:
+        logger.error(f"Failed to initialize executors: {e}")
+        return False
+    return True
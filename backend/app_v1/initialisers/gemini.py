@@ -1,20 +1,43 @@
-import logging, os, requests
+import logging, os
+from app_v1.helpers.llm_client import LLMClient
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 GEMINI_API_URL = os.getenv("GEMINI_API_URL")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "120"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "1"))
+GEMINI_RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "30"))
 
 def initialiseGemini(app):
-    logger.info("Testing Gemini connection...")
+    logger.info("Setting up Gemini client...")
+    try:
+        app.state.gemini = LLMClient(
+            GEMINI_API_URL,
+            {"Content-Type": "application/json", "X-goog-api-key": GEMINI_API_KEY},
+            "gemini",
+            connect_timeout=GEMINI_CONNECT_TIMEOUT,
+            read_timeout=GEMINI_READ_TIMEOUT,
+            max_concurrency=GEMINI_MAX_CONCURRENCY,
+            max_retries=GEMINI_MAX_RETRIES,
+            retry_base_delay=GEMINI_RETRY_BASE_DELAY,
+            retry_max_delay=GEMINI_RETRY_MAX_DELAY,
+            metrics=app.state.metrics
+        )
+    except Exception as e:
+        logger.error(f"Failed to initialize Gemini client: {e}")
+        return False
 
-    headers = {"Content-Type": "application/json", "X-goog-api-key": GEMINI_API_KEY}
+    logger.info("Testing Gemini connection...")
     payload = {"contents": [{"parts": [{"text": "Hi"}]}]} # Single token input to test
 
     try:
-        response = requests.post(GEMINI_API_URL, headers=headers, json=payload)
-        response.raise_for_status()
+        # Also opens the first pooled connection, so the first job doesn't pay for the handshake.
+        response = app.state.gemini.post(payload, "connection_test")
         logger.info(f"Gemini response code: {response.status_code}")
     except Exception as e:
         logger.error(f"Failed to connect to Gemini API: {e}")
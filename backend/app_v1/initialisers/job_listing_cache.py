@@ -0,0 +1,17 @@
+import logging, os
+from app_v1.helpers.job_listing_cache import JobListingCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_LISTING_CACHE_TTL = float(os.getenv("JOB_LISTING_CACHE_TTL", "600"))
+JOB_LISTING_CACHE_MAX_ENTRIES = int(os.getenv("JOB_LISTING_CACHE_MAX_ENTRIES", "4096"))
+
+def initialiseJobListingCache(app):
+    logger.info("Setting up job listing cache...")
+    try:
+        app.state.job_listing_cache = JobListingCache(JOB_LISTING_CACHE_TTL, JOB_LISTING_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        logger.error(f"Failed to initialize job listing cache: {e}")
+        return False
+    return True
@@ -0,0 +1,20 @@
+import logging, os
+from app_v1.helpers.job_listing_extractor import JobListingExtractor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_LISTING_SELECTORS_PATH = os.getenv("JOB_LISTING_SELECTORS_PATH", "resources/job-listing-selectors.json")
+JOB_LISTING_SELECTORS_CHECK_INTERVAL = float(os.getenv("JOB_LISTING_SELECTORS_CHECK_INTERVAL", "5"))
+
+def initialiseJobListingExtractor(app):
+    logger.info(f"Compiling job listing selectors from {JOB_LISTING_SELECTORS_PATH}...")
+    try:
+        app.state.job_listing_extractor = JobListingExtractor(
+            JOB_LISTING_SELECTORS_PATH,
+            JOB_LISTING_SELECTORS_CHECK_INTERVAL
+        )
+    except Exception as e:
+        logger.error(f"Failed to load job listing selectors: {e}")
+        return False
+    return True
@@ -0,0 +1,17 @@
+import logging, os
+from app_v1.helpers.job_status import JobStatusBuffer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_FLUSH_INTERVAL = float(os.getenv("JOB_STATUS_FLUSH_INTERVAL", "2"))
+
+def initialiseJobStatus(app):
+    logger.info("Starting job status buffer...")
+    try:
+        app.state.job_status = JobStatusBuffer(app, JOB_STATUS_FLUSH_INTERVAL)
+        app.state.job_status.start()
+    except Exception as e:
+        logger.error(f"Failed to start job status buffer: {e}")
+        return False
+    return True
@@ -0,0 +1,28 @@
+import logging, os
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RUN_EMBEDDED_WORKER = os.getenv("RUN_EMBEDDED_WORKER", "True")
+
+def initialiseJobWorker(app):
+    # Runs a job worker inside the API process, for single-process deployments.
+    # Set RUN_EMBEDDED_WORKER=False when jobs are handled by `python -m app_v1.worker` instead.
+    app.state.job_worker = None
+    if RUN_EMBEDDED_WORKER != "True":
+        logger.info("Embedded job worker disabled, jobs are run by standalone workers.")
+        return True
+
+    logger.info("Starting embedded job worker...")
+    from app_v1.initialisers.pdf_renderer import initialisePdfRenderer
+    if not initialisePdfRenderer(app):
+        return False
+
+    try:
+        from app_v1.worker import createJobWorker
+        app.state.job_worker = createJobWorker(app)
+        app.state.job_worker.start()
+    except Exception as e:
+        logger.error(f"Failed to start embedded job worker: {e}")
+        return False
+    return True
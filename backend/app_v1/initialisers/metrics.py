@@ -0,0 +1,14 @@
+import logging
+from app_v1.helpers.metrics import MetricsRegistry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def initialiseMetrics(app):
+    logger.info("Setting up metrics registry...")
+    try:
+        app.state.metrics = MetricsRegistry()
+    except Exception as e:
+        logger.error(f"Failed to initialize metrics registry: {e}")
+        return False
+    return True
@@ -0,0 +1,19 @@
+import logging, os
+from app_v1.helpers.pdf_renderer import PdfRenderPool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(os.cpu_count() or 2)))
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "60"))
+PDF_TEMPLATES_DIR = os.getenv("PDF_TEMPLATES_DIR", "resources")
+PDF_FONTS_DIR = os.getenv("PDF_FONTS_DIR", "fonts")
+
+def initialisePdfRenderer(app):
+    logger.info(f"Starting {PDF_RENDER_WORKERS} PDF render processes...")
+    try:
+        app.state.pdf_renderer = PdfRenderPool(PDF_RENDER_WORKERS, PDF_TEMPLATES_DIR, PDF_FONTS_DIR, PDF_RENDER_TIMEOUT)
+    except Exception as e:
+        logger.error(f"Failed to start PDF render pool: {e}")
+        return False
+    return True
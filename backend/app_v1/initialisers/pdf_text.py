@@ -0,0 +1,24 @@
+import logging, os
+from app_v1.helpers.pdf_text import PdfTextPool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_PAGES_PER_RANGE = int(os.getenv("PDF_PAGES_PER_RANGE", "4"))
+
+def initialisePdfText(app):
+    # PDF_EXTRACT_WORKERS=0 extracts every PDF serially on the calling thread.
+    app.state.pdf_text_pool = None
+    if PDF_EXTRACT_WORKERS <= 0:
+        logger.info("Parallel PDF text extraction disabled.")
+        return True
+
+    logger.info(f"Starting {PDF_EXTRACT_WORKERS} PDF text extraction processes...")
+    try:
+        app.state.pdf_text_pool = PdfTextPool(PDF_EXTRACT_WORKERS, PDF_PARALLEL_MIN_PAGES, PDF_PAGES_PER_RANGE)
+    except Exception as e:
+        logger.error(f"Failed to start PDF text extraction pool: {e}")
+        return False
+    return True
@@ -1,6 +1,12 @@
 import psycopg2, logging, os
+from app_v1.helpers.postgresql_pool import PostgreSQLPool, getConnection
 from app_v1.helpers.rate_limits import initialiseRateLimitsTable
 from app_v1.helpers.ai_jobs import initialiseAIJobsTable
+from app_v1.helpers.job_queue import createAIJobsQueueColumns
+from app_v1.helpers.job_status import createAIJobsStageTimingsColumn
+from app_v1.helpers.resume_artifacts import createResumeArtifactsTables
+from app_v1.helpers.embedding_cache import createEmbeddingCacheTable
+from app_v1.helpers.generation_cache import createGenerationCacheTable
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -12,28 +18,32 @@ RDS_PASSWORD = os.getenv("RDS_PASSWORD")
 RDS_HOST = os.getenv("RDS_HOST")
 RDS_PORT = os.getenv("RDS_PORT")
 
+RDS_POOL_MIN = int(os.getenv("RDS_POOL_MIN", "2"))
+RDS_POOL_MAX = int(os.getenv("RDS_POOL_MAX", "20"))
+RDS_POOL_TIMEOUT = float(os.getenv("RDS_POOL_TIMEOUT", "30"))
+
 DROP_TABLES = os.getenv("DROP_TABLES", "False")
 
 def initialisePostgreSQL(app):
     logger.info("Initialising PostgreSQL...")
     try:
-        conn = psycopg2.connect(
+        app.state.postgresql_pool = PostgreSQLPool(
+            RDS_POOL_MIN,
+            RDS_POOL_MAX,
+            RDS_POOL_TIMEOUT,
             dbname=RDS_DBNAME,
             user=RDS_USER,
             password=RDS_PASSWORD,
             host=RDS_HOST,
             port=RDS_PORT
         )
-        app.state.postgresql_db = conn
-        logger.info("Connected to PostgreSQL database.")
+        logger.info(f"Created PostgreSQL connection pool (min={RDS_POOL_MIN}, max={RDS_POOL_MAX}).")
         
         logger.info("Verifying PostgreSQL connection...")
-        cur = conn.cursor()
-        cur.execute("SELECT version();")
-        db_version = cur.fetchone()
+        with getConnection(app) as conn, conn.cursor() as cur:
+            cur.execute("SELECT version();")
+            db_version = cur.fetchone()
         logger.info(f"PostgreSQL database version: {db_version}")
-
-        cur.close()
     except Exception as e:
         logger.error(f"Failed to connect to PostgreSQL: {e}")
         return False
@@ -44,10 +54,9 @@ def initialisePostgreSQL(app):
             DROP SCHEMA public CASCADE;
             CREATE SCHEMA public;
             """
-            cur = app.state.postgresql_db.cursor()
-            cur.execute(drop_tables_sql)
-            app.state.postgresql_db.commit()
-            cur.close()
+            with getConnection(app) as conn, conn.cursor() as cur:
+                cur.execute(drop_tables_sql)
+                conn.commit()
             logger.info(f"Successfully dropped tables")
         except Exception as e:
             logger.error(f"Failed to drop tables: {e}")
@@ -55,9 +64,14 @@ def initialisePostgreSQL(app):
     try:
         initialiseRateLimitsTable(app)
         initialiseAIJobsTable(app)
+        createAIJobsQueueColumns(app)
+        createAIJobsStageTimingsColumn(app)
+        createResumeArtifactsTables(app)
+        createEmbeddingCacheTable(app)
+        createGenerationCacheTable(app)
     except Exception as e:
         logger.error(f"Failed to initialise tables: {e}")
         return False
 
     logger.info("PostgreSQL and tables initialised successfully.")
-    return True
\ No newline at end of file
+    return True
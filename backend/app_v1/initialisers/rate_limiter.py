@@ -0,0 +1,27 @@
+import logging, os
+from app_v1.helpers.ai_jobs import countRecentJobs
+from app_v1.helpers.rate_limiter import SlidingWindowRateLimiter
+from app_v1.helpers.ttl_cache import TTLCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_RECONCILE_SECONDS = float(os.getenv("RATE_LIMIT_RECONCILE_SECONDS", "60"))
+RATE_LIMIT_RECHECK_SECONDS = float(os.getenv("RATE_LIMIT_RECHECK_SECONDS", "5"))
+RATE_LIMIT_MAX_USERS = int(os.getenv("RATE_LIMIT_MAX_USERS", "100000"))
+SUBSCRIPTION_CACHE_TTL = float(os.getenv("SUBSCRIPTION_CACHE_TTL", "300"))
+
+def initialiseRateLimiter(app):
+    logger.info("Setting up rate limiter and subscription cache...")
+    try:
+        app.state.subscription_cache = TTLCache(100, SUBSCRIPTION_CACHE_TTL)
+        app.state.rate_limiter = SlidingWindowRateLimiter(
+            lambda user_uuid: countRecentJobs(app, user_uuid),
+            RATE_LIMIT_RECONCILE_SECONDS,
+            RATE_LIMIT_RECHECK_SECONDS,
+            RATE_LIMIT_MAX_USERS
+        )
+    except Exception as e:
+        logger.error(f"Failed to initialize rate limiter: {e}")
+        return False
+    return True
@@ -0,0 +1,25 @@
+import logging, os
+from app_v1.helpers.resume_cache import ResumeIndexCache
+from app_v1.helpers.resume_store import LocalResumeStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "256"))
+RESUME_CACHE_MAX_MB = int(os.getenv("RESUME_CACHE_MAX_MB", "512"))
+RESUME_STORE_DIR = os.getenv("RESUME_STORE_DIR", "/tmp/mart-resume-store")
+RESUME_STORE_MAX_MB = int(os.getenv("RESUME_STORE_MAX_MB", "2048"))
+
+def initialiseResumeCache(app):
+    logger.info("Setting up resume index cache...")
+    try:
+        app.state.resume_cache = ResumeIndexCache(RESUME_CACHE_MAX_ENTRIES, RESUME_CACHE_MAX_MB * 1024 * 1024)
+        # An empty RESUME_STORE_DIR keeps resumes on the heap only.
+        app.state.resume_store = None
+        if RESUME_STORE_DIR:
+            app.state.resume_store = LocalResumeStore(RESUME_STORE_DIR, RESUME_STORE_MAX_MB * 1024 * 1024)
+            logger.info(f"Memory-mapping resumes from {RESUME_STORE_DIR} (max {RESUME_STORE_MAX_MB} MB)")
+    except Exception as e:
+        logger.error(f"Failed to initialize resume index cache: {e}")
+        return False
+    return True
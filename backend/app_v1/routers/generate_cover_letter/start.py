@@ -7,23 +7,26 @@ It contains the endpoint:
 and starts a background job to generate a cover letter.
 """
 
-from fastapi import FastAPI, APIRouter, HTTPException, Query, BackgroundTasks, Request, Depends
-import requests, base64, boto3, faiss, gzip, json, uuid, pickle, os, re, logging
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Depends
+import requests, base64, boto3, faiss, json, uuid, os, re, logging, threading
 from fastapi.responses import StreamingResponse, JSONResponse
-from bs4 import BeautifulSoup
-from weasyprint import HTML
 from datetime import date
 from io import BytesIO
 import numpy as np
 
 from app_v1.helpers.rate_limits import authenticateSessionAndRateLimit
-from app_v1.helpers.ai_jobs import createJob, getJob, updateJobStatus, completeJob
-
-env = Environment(
-    loader=FileSystemLoader("resources"),
-    autoescape=select_autoescape(["html", "xml"])
-)
+from app_v1.helpers.ai_jobs import completeJob
+from app_v1.helpers.job_status import reportJobStage
+from app_v1.helpers.job_queue import enqueueJob
+from app_v1.helpers.executors import runBlocking
+from app_v1.helpers.resume_artifacts import resolveResumeArtifact
+from app_v1.helpers.embedding_cache import embedTexts
+from app_v1.helpers.artifact_format import ArtifactView, encodeArtifact, readLegacyArtifact
+from app_v1.helpers.resume_store import MappedFlatIndex
+from app_v1.helpers.vector_index import chooseIndex, buildIndex
+from app_v1.helpers.resume_collection import listUserResumes, getUserCollection
+from app_v1.helpers.generation_cache import generationKey, getCachedGeneration, storeGeneration
+from app_v1.helpers.job_listing_cache import JobListingUnavailable, missingListingFields
 
 logger = logging.getLogger(__name__)
 
@@ -31,54 +34,164 @@ router = APIRouter(prefix="/v1/generate_cover_letter", tags=["generate_cover_let
 
 EMBEDDER_ID = os.getenv("EMBEDDER_ID")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
-GEMINI_API_URL = os.getenv("GEMINI_API_URL")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-def _deserialize_faiss(index):
-    ready = pickle.load(index)
-    return faiss.deserialize_index(ready)
-
-def _load_selectors():
-    with open("resources/job-listing-selectors.json", "r") as f:
-        selectors = json.load(f)
-        if selectors:
-            return selectors
-    raise Exception("Failed to load job listing selectors")
-
-def _extract_job_listing_details(job_listing_text: str, selectors: dict):
-    soup = BeautifulSoup(job_listing_text, "html.parser")
-    
-    result = {}
-
-    for key, selector_list in selectors.items():
-        value = None
-        for selector in selector_list:
-            el = soup.select_one(selector)
-            if el and el.get_text(strip=True):
-                value = el.get_text(strip=True)
-                break
-        result[key] = value
-    return result
-
-def _retrieve(app: FastAPI, index, chunks: list, query: str, k: int = 6):
-    vecs = []
-    batch_index = 0
-    while batch_index < len(query):
-        batch = query[batch_index:min(batch_index + 1050, len(query) - batch_index)]
-        vecs.extend(app.state.embedder.embeddings.create(
-            model=EMBEDDER_ID.lower(),
-            input=batch
-        ).data)
-        batch_index += 950
+QUERY_WINDOW_TOKENS = int(os.getenv("QUERY_WINDOW_TOKENS", "256"))
+QUERY_WINDOW_OVERLAP = int(os.getenv("QUERY_WINDOW_OVERLAP", "32"))
+# Windows advance by their size minus the overlap, which must be at least one word.
+if QUERY_WINDOW_TOKENS < 1 or not 0 <= QUERY_WINDOW_OVERLAP < QUERY_WINDOW_TOKENS:
+    raise ValueError(
+        f"QUERY_WINDOW_OVERLAP ({QUERY_WINDOW_OVERLAP}) must be at least 0 and less than "
+        f"QUERY_WINDOW_TOKENS ({QUERY_WINDOW_TOKENS})"
+    )
+QUERY_POOLING = os.getenv("QUERY_POOLING", "mean")
+# How the window vectors of a long query are combined, anything else would silently fall back to one of them.
+QUERY_POOLINGS = ("mean", "max")
+if QUERY_POOLING not in QUERY_POOLINGS:
+    raise ValueError(f"QUERY_POOLING ({QUERY_POOLING!r}) must be one of {', '.join(QUERY_POOLINGS)}")
+JOB_LISTING_FETCH_TIMEOUT = float(os.getenv("JOB_LISTING_FETCH_TIMEOUT", "10"))
+RESUME_LOAD_TIMEOUT = float(os.getenv("RESUME_LOAD_TIMEOUT", "30"))
+JOB_ENQUEUE_TIMEOUT = float(os.getenv("JOB_ENQUEUE_TIMEOUT", "10"))
+# The file_id asking for every resume the user has indexed.
+ALL_RESUMES = "all"
+
+def _is_missing(e: Exception) -> bool:
+    return getattr(e, "response", {}).get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+def _check_resume_exists(s3, file_id: str):
+    # Raises if the indexed resume artifact is missing, resumes indexed before .mart artifacts have a .pkl and a .bin.
+    try:
+        s3.head_object(Bucket=S3_BUCKET_NAME, Key=f"resumes/{file_id}.mart")
+    except Exception as e:
+        if not _is_missing(e):
+            raise
+        s3.head_object(Bucket=S3_BUCKET_NAME, Key=f"resumes/{file_id}.pkl")
+        s3.head_object(Bucket=S3_BUCKET_NAME, Key=f"resumes/{file_id}.bin")
+
+def _migrate_legacy_resume(s3, file_id: str):
+    # Reads a resume stored as a pickled FAISS index and a gzip JSON bundle, and writes it back as a .mart artifact.
+    index_data = BytesIO()
+    s3.download_fileobj(S3_BUCKET_NAME, f"resumes/{file_id}.pkl", index_data)
+    index_data.seek(0)
+    blob = s3.get_object(Bucket=S3_BUCKET_NAME, Key=f"resumes/{file_id}.bin")["Body"].read()
+
+    artifact_id, vectors, chunks = readLegacyArtifact(index_data, blob)
+    if artifact_id != file_id:
+        raise HTTPException(status_code=400, detail="File ID does not match the indexed resume")
+
+    kind, param = chooseIndex(len(vectors))
+    artifact = encodeArtifact(file_id, vectors, chunks, index_kind=kind, index_param=param)
+    try:
+        s3.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=f"resumes/{file_id}.mart",
+            Body=artifact,
+            ContentType="application/octet-stream"
+        )
+        logger.info(f"Migrated legacy resume artifacts for {file_id}")
+    except Exception as e:
+        # The legacy objects are left in place, so the resume still loads if the write fails.
+        logger.error(f"Failed to migrate legacy resume artifacts for {file_id}: {e}")
 
-    q = np.array([vecs[0].embedding], dtype="float32")  # shape (1, D)
+    return artifact
 
+def _fetch_resume_artifact(s3, file_id: str) -> bytes:
+    # Downloads an indexed resume's .mart artifact in one request, migrating legacy resumes on first use.
+    try:
+        return s3.get_object(Bucket=S3_BUCKET_NAME, Key=f"resumes/{file_id}.mart")["Body"].read()
+    except Exception as e:
+        if not _is_missing(e):
+            raise
+    return _migrate_legacy_resume(s3, file_id)
+
+def _open_resume(file_id: str, fetch, resume_store=None) -> ArtifactView:
+    # Opens an indexed resume's artifact, memory-mapped from the local resume store when there is one.
+    # fetch() returns the artifact's bytes.
+    if resume_store is not None:
+        artifact = resume_store.open(file_id, fetch)
+    else:
+        artifact = ArtifactView(fetch())
+    if artifact.artifact_id != file_id:
+        raise HTTPException(status_code=400, detail="File ID does not match the indexed resume")
+    return artifact
+
+def _load_resume(file_id: str, fetch, resume_store=None):
+    # Loads an indexed resume, returning (index, chunks).
+    # The artifact records which index to build: flat artifacts in the local resume store are
+    # memory-mapped and searched in place, everything else is loaded into a FAISS index.
+    artifact = _open_resume(file_id, fetch, resume_store)
+    if resume_store is not None and artifact.index_kind == "flat":
+        return MappedFlatIndex(artifact.vectors), artifact.chunks
+    return buildIndex(artifact.vectors, artifact.index_kind, artifact.index_param), list(artifact.chunks)
+
+# Queries asked of every resume, their embeddings are computed once per embedder and reused.
+_CONSTANT_QUERIES = ("name", "contact details", "location")
+_constant_query_vectors = {}
+_constant_query_lock = threading.Lock()
+
+def _query_windows(query: str) -> list:
+    # Splits a long query into overlapping windows of QUERY_WINDOW_TOKENS whitespace-separated words.
+    # The embedder's tokenizer isn't exposed, and English averages about 1.3 tokens per word, so a
+    # window is longer than its word count in tokens (256 words is roughly 330). Keep the window
+    # at most about three quarters of the embedder's input limit.
+    tokens = query.split()
+    if len(tokens) <= QUERY_WINDOW_TOKENS:
+        return [query]
+
+    step = QUERY_WINDOW_TOKENS - QUERY_WINDOW_OVERLAP
+    return [
+        " ".join(tokens[i:i + QUERY_WINDOW_TOKENS])
+        for i in range(0, len(tokens) - QUERY_WINDOW_OVERLAP, step)
+    ]
+
+def _pool_windows(vecs: np.ndarray, pooling: str) -> np.ndarray:
+    # Combines L2-normalized window vectors of one query into a single query vector.
+    if pooling == "max":
+        return vecs.max(axis=0)
+    if pooling == "mean":
+        return vecs.mean(axis=0)
+    raise ValueError(f"Unknown query pooling: {pooling!r}")
+
+def _embed_queries(app: FastAPI, queries: list, pooling: str = None) -> np.ndarray:
+    # Embeds all queries, and every window of long queries, in at most one embedder request.
+    # Constant queries are served from memory, long queries are pooled across their windows.
+    pooling = pooling or QUERY_POOLING
+    windows = [_query_windows(query) for query in queries]
+
+    cached = _constant_query_vectors.get(EMBEDDER_ID, {})
+    misses = [w for w in dict.fromkeys(w for ws in windows for w in ws) if w not in cached]
+
+    fresh = {}
+    if misses:
+        # Windows seen before, e.g. from a listing already written for, come from the persistent embedding cache.
+        vecs = embedTexts(app, misses, EMBEDDER_ID.lower(), "embed_queries")
+        fresh = dict(zip(misses, vecs))
+
+        constants = {w: v for w, v in fresh.items() if w in _CONSTANT_QUERIES}
+        if constants:
+            with _constant_query_lock:
+                _constant_query_vectors.setdefault(EMBEDDER_ID, {}).update(constants)
+
+    pooled = []
+    for ws in windows:
+        vecs = np.stack([fresh[w] if w in fresh else cached[w] for w in ws])
+        faiss.normalize_L2(vecs)
+        pooled.append(_pool_windows(vecs, pooling))
+
+    q = np.stack(pooled)  # shape (n, D)
     faiss.normalize_L2(q)
+    return q
+
+def _retrieve_many(app: FastAPI, index, chunks: list, queries: list, ks: list, pooling: str = None) -> list:
+    # Retrieves the top ks[i] chunks for each of queries[i] with one embedding request and one FAISS search.
+    # Each chunk comes with its cosine similarity to the query, highest first.
+    q = _embed_queries(app, queries, pooling)
 
-    k = min(k, index.ntotal)
+    k = min(max(ks), index.ntotal)
     scores, ids = index.search(q, k)
 
-    return [(chunks[i], float(scores[0][j])) for j, i in enumerate(ids[0])]
+    return [
+        [(chunks[i], float(scores[row][j])) for j, i in enumerate(ids[row][:min(ks[row], k)]) if i >= 0]
+        for row in range(len(queries))
+    ]
 
 def _make_prompt(
     title: str, 
@@ -144,23 +257,29 @@ Sincerely yours,
 """
     return system, prompt
 
-def _get_gemini_response(system: str, prompt: str):
-    headers = {
-        "Content-Type": "application/json",
-        "X-goog-api-key": GEMINI_API_KEY
+_COVER_LETTER_FIELDS = {
+    "letterhead": { "type": "STRING" },
+    "date": { "type": "STRING" },
+    "inside_address": { "type": "STRING" },
+    "salutation": { "type": "STRING" },
+    "reference": { "type": "STRING" },
+    "letterbody": { "type": "STRING" },
+    "closing": { "type": "STRING" },
+    "signature": { "type": "STRING" }
+}
+
+_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": _COVER_LETTER_FIELDS,
+        "propertyOrdering": list(_COVER_LETTER_FIELDS.keys())
     }
-  
-    fields = {
-        "letterhead": { "type": "STRING" },
-        "date": { "type": "STRING" },
-        "inside_address": { "type": "STRING" },
-        "salutation": { "type": "STRING" },
-        "reference": { "type": "STRING" },
-        "letterbody": { "type": "STRING" },
-        "closing": { "type": "STRING" },
-        "signature": { "type": "STRING" }
-    }
-  
+}
+
+def _get_gemini_response(gemini, system: str, prompt: str):
+    fields = _COVER_LETTER_FIELDS
+
     payload = {
         "system_instruction": {
             "parts": [
@@ -180,20 +299,13 @@ def _get_gemini_response(system: str, prompt: str):
         ],
         "generationConfig": {
             "responseMimeType": "application/json",
-            "responseSchema": {
-                "type": "ARRAY",
-                "items": {
-                    "type": "OBJECT",
-                    "properties": fields,
-                    "propertyOrdering": list(fields.keys())
-                }
-            }
+            "responseSchema": _RESPONSE_SCHEMA
         }
     }
   
     try:
-        response = requests.post(GEMINI_API_URL, headers=headers, json=payload)
-        response.raise_for_status()  # Raises an HTTPError for bad responses
+        # Pooled connection, timeouts and retries of 429/5xx responses are handled by the shared client.
+        response = gemini.post(payload, "generate_content")
     except requests.exceptions.HTTPError as http_err:
         logger.info(f"HTTP error occurred: {http_err}")
         raise Exception(f"HTTP error occurred: {http_err}")
@@ -236,13 +348,9 @@ def _get_gemini_response(system: str, prompt: str):
   
     return result
 
-def _generate_pdf(cover_letter_context):
-    html_template = env.get_template("letter.html")
-    html = html_template.render(**cover_letter_context)
-    pdf_io = BytesIO()
-    HTML(string=html, base_url=".").write_pdf(pdf_io)
-    pdf_io.seek(0)
-    return pdf_io
+def _generate_pdf(pdf_renderer, cover_letter_context):
+    # Rendering runs on the pre-warmed render process pool, returning the PDF bytes.
+    return pdf_renderer.render(cover_letter_context)
 
 def _upload_to_s3(s3, pdf_bytes, job_id):
     s3.put_object(
@@ -252,83 +360,136 @@ def _upload_to_s3(s3, pdf_bytes, job_id):
         ContentType="application/pdf"
     )
 
-def __bullets_to_html(text: str) -> str:
-    if not text:
-        return ""
-    lines = text.splitlines()
-    out = []
-    in_list = False
-    for line in lines:
-        if re.match(r'^\s*([*\-•])\s+', line):
-            if not in_list:
-                out.append("<ul>")
-                in_list = True
-            item = re.sub(r'^\s*([*\-•])\s+', '', line)
-            out.append(f"<li>{item}</li>")
-        else:
-            if in_list:
-                out.append("</ul>")
-                in_list = False
-            if line.strip():
-                out.append(f"<p>{line}</p>")
-    if in_list:
-        out.append("</ul>")
-    return "\n".join(out)
-env.filters["bullets"] = __bullets_to_html
 
 def generate_cover_letter(
     bundle: dict,
-    job_listing_text: str,
+    job_listing_details: dict,
     job_id: str,
     user_id: str,
-    app: FastAPI
+    app: FastAPI,
+    lease: str,
+    force_regenerate: bool = False
 ):
-    try:
-        createJob(app, job_id, user_id, "GenerateCoverletter", "Starting")
-        index = bundle["index"]
-        chunks = bundle["chunks"]
-        
-        updateJobStatus(app, job_id, "Unpickling indexed resume")
-        index = _deserialize_faiss(index)
-
-        updateJobStatus(app, job_id, "Loading html selectors")
-        selectors = _load_selectors()
-
-        updateJobStatus(app, job_id, "Extracting job listing details")
-        job_listing_details = _extract_job_listing_details(job_listing_text, selectors)
-
-        updateJobStatus(app, job_id, "Retrieving relevant resume data")
-        retrieved = {
-            "job_description": _retrieve(app, index, chunks, job_listing_details['description'], k=8),
-            "name": _retrieve(app, index, chunks, "name", k=3),
-            "contact_details": _retrieve(app, index, chunks, "contact details", k=3),
-            "location": _retrieve(app, index, chunks, "location", k=3)
-        }
+    # Runs on a job worker holding the job's lease, exceptions propagate so the worker can retry or fail the job.
+    index = bundle["index"]
+    chunks = bundle["chunks"]
+
+    reportJobStage(app, job_id, "Retrieving relevant resume data")
+    job_description, name, contact_details, location = _retrieve_many(
+        app,
+        index,
+        chunks,
+        [job_listing_details['description'], *_CONSTANT_QUERIES],
+        [8, 3, 3, 3]
+    )
+    retrieved = {
+        "job_description": job_description,
+        "name": name,
+        "contact_details": contact_details,
+        "location": location
+    }
 
-        updateJobStatus(app, job_id, "Constructing Gemini prompt")
-        system, prompt = _make_prompt(
-            job_listing_details['title'],
-            job_listing_details['company'],
-            job_listing_details['location'],
-            job_listing_details['description'],
-            retrieved['job_description'],
-            retrieved['name'] + retrieved['contact_details'] + retrieved['location']
-        )
+    reportJobStage(app, job_id, "Constructing Gemini prompt")
+    system, prompt = _make_prompt(
+        job_listing_details['title'],
+        job_listing_details['company'],
+        job_listing_details['location'],
+        job_listing_details['description'],
+        retrieved['job_description'],
+        retrieved['name'] + retrieved['contact_details'] + retrieved['location']
+    )
 
-        updateJobStatus(app, job_id, "Asking Gemini to write a cover letter")
-        cover_letter_content = _get_gemini_response(system, prompt)
+    # Regenerating for the same listing and resume on the same day builds the same prompt,
+    # its cached response is reused unless the user asked for a fresh letter.
+    cache_key = generationKey(system, prompt, _RESPONSE_SCHEMA, app.state.gemini.url)
+    cover_letter_content = None if force_regenerate else getCachedGeneration(app, cache_key)
+    if cover_letter_content is not None:
+        reportJobStage(app, job_id, "Reusing Gemini's cached cover letter")
+    else:
+        reportJobStage(app, job_id, "Asking Gemini to write a cover letter")
+        cover_letter_content = _get_gemini_response(app.state.gemini, system, prompt)
+        storeGeneration(app, cache_key, cover_letter_content)
+
+    reportJobStage(app, job_id, "Generating a pdf with Gemini's response")
+    pdf_bytes = _generate_pdf(app.state.pdf_renderer, cover_letter_content)
+
+    reportJobStage(app, job_id, "Uploading pdf to S3")
+    with app.state.metrics.time("mart_external_call_seconds", service="s3", operation="upload_cover_letter"):
+        _upload_to_s3(app.state.s3, pdf_bytes, job_id)
 
-        updateJobStatus(app, job_id, "Generating a pdf with Gemini's response")
-        pdf_bytes = _generate_pdf(cover_letter_content)
+    completeJob(app, job_id, lease)
+    return job_id
+
+def _resume_fetcher(app: FastAPI, file_id: str):
+    def fetch():
+        with app.state.metrics.time("mart_external_call_seconds", service="s3", operation="load_resume"):
+            return _fetch_resume_artifact(app.state.s3, file_id)
+    return fetch
+
+def run_generate_cover_letter_job(app: FastAPI, job: dict):
+    # Job queue handler for GenerateCoverletter jobs.
+    payload = job["Payload"]
+    file_id = payload["file_id"]
+
+    if file_id == ALL_RESUMES:
+        # One search across every resume the user has indexed, the collection is cached like a resume
+        # and only resumes indexed since it was built are fetched.
+        reportJobStage(app, job["JobID"], "Loading indexed resumes")
+        collection = getUserCollection(
+            app,
+            job["CreatedBy"],
+            lambda artifact_id: _open_resume(artifact_id, _resume_fetcher(app, artifact_id), app.state.resume_store)
+        )
+        if collection is None:
+            raise Exception(f"No indexed resumes for user {job['CreatedBy']}")
+        index, chunks = collection, collection.chunks
+    else:
+        reportJobStage(app, job["JobID"], "Loading indexed resume")
+        # Hot resumes are served from the process-wide cache, then the host's local resume store,
+        # concurrent misses share one load.
+        index, chunks = app.state.resume_cache.getOrLoad(
+            file_id,
+            lambda: _load_resume(file_id, _resume_fetcher(app, file_id), app.state.resume_store)
+        )
 
-        updateJobStatus(app, job_id, "Uploading pdf to S3")
-        _upload_to_s3(app.state.s3, pdf_bytes, job_id)
+    job_listing_details = payload.get("job_listing_details")
+    if job_listing_details is None:
+        # Jobs queued before listings were parsed on fetch carry the listing's HTML.
+        reportJobStage(app, job["JobID"], "Extracting job listing details")
+        job_listing_details = app.state.job_listing_extractor.extract(payload["job_listing_text"])
+        missing = missingListingFields(job_listing_details)
+        if missing:
+            raise Exception(f"Job listing has no {', '.join(missing)}")
+
+    return generate_cover_letter(
+        {"index": index, "chunks": chunks},
+        job_listing_details,
+        job["JobID"],
+        job["CreatedBy"],
+        app,
+        job["LockedBy"],
+        payload.get("force_regenerate", False)
+    )
 
-        completeJob(app, job_id)
-        return job_id
+async def _resolve_resume(request: Request, file_id: str) -> str:
+    # Returns the artifact id holding an indexed resume, after checking its artifact exists.
+    try:
+        # Deduplicated uploads share the artifacts (and resume cache entry) of the first identical upload.
+        artifact_id = await runBlocking(
+            request.app, "io", RESUME_LOAD_TIMEOUT, "Resolving indexed resume",
+            resolveResumeArtifact, request.app, file_id
+        )
+        # Only existence is checked here, the worker running the job loads the resume itself.
+        await runBlocking(
+            request.app, "io", RESUME_LOAD_TIMEOUT, "Checking indexed resume",
+            _check_resume_exists, request.app.state.s3, artifact_id
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        job = getJob(app, job_id, user_id)
-        updateJobStatus(app, job_id, f"Job threw an Exception: {e} at {job['Status']}")
+        raise HTTPException(status_code=404, detail=f"Indexed resume with id: {file_id} not found: {str(e)}")
+
+    return artifact_id
 
 @router.put(
     "/start",
@@ -337,14 +498,18 @@ def generate_cover_letter(
 Begin an asynchronous job to generate a tailored cover letter from a LinkedIn job listing and an indexed resume.
 
 **What it does**
-- Validates the `job_listing_url` is reachable (`200 OK`) and fetches the HTML.
-- Downloads the FAISS index (`.pkl`) and resume bundle (`.bin`) from S3 for `file_id`, then decompresses/deserializes them.
-- Creates a new `job_id`, enqueues `generate_cover_letter` as a background task, and records status in `app.state.cover_letter_jobs`.
-- Background task extracts job details, retrieves relevant resume snippets, calls Gemini to create content, renders a PDF, and uploads it to S3.
+- Validates the `job_listing_url` is reachable (`200 OK`) and extracts the listing's title, company, location and description.
+  Extracted listings are cached by normalized URL for `JOB_LISTING_CACHE_TTL` seconds, then revalidated with `ETag`/`Last-Modified`.
+- Checks the indexed resume artifact for `file_id` exists in S3, or with `file_id=all` that the user has indexed a resume.
+- Creates a new `job_id` and durably queues a `GenerateCoverletter` job in the `AIJobs` table.
+- A job worker loads the resume artifact (`.mart`) through its resume cache, retrieves relevant resume snippets, calls Gemini to create content, renders a PDF, and uploads it to S3.
+- With `GENERATION_CACHE_TTL_HOURS` set, Gemini's response to an identical prompt (same listing, resume and day) is reused.
+- With `file_id=all` the snippets are retrieved in one search across all of the user's indexed resumes, merged into a per-user collection.
 
 **Query parameters**
 - `job_listing_url` *(str, required)* — URL of the LinkedIn job listing.
-- `file_id` *(str, required)* — UUID of the previously indexed resume.
+- `file_id` *(str, required)* — UUID of the previously indexed resume, or `all` for every resume the user has indexed.
+- `force_regenerate` *(bool, optional)* — Ask Gemini for a new letter even if an identical prompt's response is cached (default `false`).
 
 **Dependencies**
 - `authenticate` — Requires a valid authenticated user.
@@ -352,64 +517,69 @@ Begin an asynchronous job to generate a tailored cover letter from a LinkedIn jo
 
 **Responses**
 - `202 Accepted` — Returns `{"uuid": "<job-id>", "message": "Resume indexing job started in the background"}`.
-- `404 Not Found` — If the job listing URL is unreachable/non-200, or the indexed resume artifacts (`.pkl`/`.bin`) are missing/invalid.
+- `404 Not Found` — If the job listing URL is unreachable/non-200, or the indexed resume artifact is missing/invalid.
+- `422 Unprocessable Entity` — If the listing's title, company, location or description couldn't be extracted.
+- `503 Service Unavailable` — If the job couldn't be queued.
+- `504 Gateway Timeout` — If fetching the job listing or checking the indexed resume takes too long.
 - `401 Unauthorized` — If authentication fails (from dependency).
 - `429 Too Many Requests` — If rate limiting is triggered (from dependency).
 """
 )
 async def start_generate_cover_letter_job(
-    background_tasks: BackgroundTasks,
     request: Request,
     job_listing_url: str = Query(..., description="URL of the LinkedIn job listing"),
-    file_id: str = Query(..., description="Indexed resume uuid"),
+    file_id: str = Query(..., description="Indexed resume uuid, or \"all\" for all of the user's resumes"),
+    force_regenerate: bool = Query(False, description="Bypass the cached response of an identical prompt"),
     user_data: dict = Depends(authenticateSessionAndRateLimit)
 ):
     job_listing_url = job_listing_url.strip()
     file_id = file_id.strip()
 
-    job_listing = requests.get(job_listing_url, timeout = 5)
-
-    if job_listing.status_code != 200:
-        raise HTTPException(status_code=404, detail="Job listing not found")
-
     try:
-        index_data = BytesIO()
-        boto_resp = request.app.state.s3.download_fileobj(
-            S3_BUCKET_NAME, 
-            f"resumes/{file_id}.pkl",
-            index_data
+        # Popular listings are served from the listing cache, the HTML is only fetched and parsed
+        # when the cached fields have expired and the listing has changed.
+        job_listing_details = await runBlocking(
+            request.app, "io", JOB_LISTING_FETCH_TIMEOUT, "Fetching job listing",
+            request.app.state.job_listing_cache.get, job_listing_url, request.app.state.job_listing_extractor
         )
+    except JobListingUnavailable:
+        raise HTTPException(status_code=404, detail="Job listing not found")
 
-        index_data.seek(0)
-
-        boto_resp = request.app.state.s3.get_object(
-            Bucket=S3_BUCKET_NAME, 
-            Key=f"resumes/{file_id}.bin"
-        )
-
-        blob = boto_resp["Body"].read()
-
-        decompressed = gzip.decompress(blob)
-
-        bundle = json.loads(decompressed.decode("utf-8"))
+    missing = missingListingFields(job_listing_details)
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Couldn't extract the job listing's {', '.join(missing)}")
 
-        bundle["index"] = index_data
+    user_uuid = next((attr['Value'] for attr in user_data['UserAttributes'] if attr['Name'] == "sub"), None)
+    if user_uuid is None:
+        raise HTTPException(status_code=401, detail=f"No User Attribute: sub")
 
-        if bundle["uuid"] != file_id:
-            raise HTTPException(status_code=400, detail="File ID does not match the indexed resume")
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=f"Indexed resume with id: {file_id} not found: {str(e)}")
+    if file_id == ALL_RESUMES:
+        artifact_ids = await runBlocking(
+            request.app, "io", RESUME_LOAD_TIMEOUT, "Listing indexed resumes",
+            listUserResumes, request.app, user_uuid
+        )
+        if not artifact_ids:
+            raise HTTPException(status_code=404, detail="No indexed resumes found")
+        artifact_id = ALL_RESUMES
+    else:
+        artifact_id = await _resolve_resume(request, file_id)
 
     job_id = str(uuid.uuid4())
 
-    for attr in user_data['UserAttributes']:
-        if attr['Name'] == "sub":
-            background_tasks.add_task(generate_cover_letter, bundle, job_listing.text, job_id, attr['Value'], request.app)
-            return JSONResponse(
-                {
-                    "uuid": job_id,
-                    "message": "Generate cover letter job started in the background"
-                },
-                status_code=202
-            )
-    raise HTTPException(status_code=401, detail=f"No User Attribute: sub")
\ No newline at end of file
+    # The write isn't abandoned, PostgreSQL rolls it back after JOB_ENQUEUE_TIMEOUT instead,
+    # so a job is never created behind a 504.
+    queued = await runBlocking(
+        request.app, "io", None, "Queueing job",
+        enqueueJob, request.app, job_id, user_uuid, "GenerateCoverletter",
+        {"file_id": artifact_id, "job_listing_details": job_listing_details, "force_regenerate": force_regenerate},
+        statement_timeout=JOB_ENQUEUE_TIMEOUT
+    )
+    if not queued:
+        raise HTTPException(status_code=503, detail="Failed to queue cover letter job")
+    return JSONResponse(
+        {
+            "uuid": job_id,
+            "message": "Generate cover letter job started in the background"
+        },
+        status_code=202
+    )
@@ -19,7 +19,7 @@ router = APIRouter(prefix="/v1/generate_cover_letter", tags=["generate_cover_let
 Retrieve the current status of a cover-letter generation job.
 
 **What it does**
-- Looks up the job in `app.state.cover_letter_jobs` using the provided `job_id`.
+- Looks up the job in the `AIJobs` table using the provided `job_id`.
 - Returns the job's UUID along with its current status metadata.
 
 **Path parameters**
@@ -6,63 +6,70 @@ It contains the endpoint:
 - POST /v1/index_resume/start: Accepts a PDF file, processes it, and starts a background job to index the resume.
 """
 
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, BackgroundTasks, Request, Depends
-import base64, faiss, boto3, gzip, uuid, json, re, os, pickle
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, Request, Depends
+import base64, faiss, boto3, uuid, re, os, logging
 from fastapi.responses import JSONResponse
-from pypdf import PdfReader
-from io import BytesIO
 import numpy as np
 
 
-from app_v1.helpers.rate_limits import authenticateSessionAndRateLimit, getSubscription
-from app_v1.helpers.ai_jobs import createJob, getJob, updateJobStatus, completeJob
+from app_v1.helpers.rate_limits import authenticateSessionAndRateLimit
+from app_v1.helpers.ai_jobs import completeJob
+from app_v1.helpers.job_status import reportJobStage
+from app_v1.helpers.job_queue import enqueueJob
+from app_v1.helpers.executors import runBlocking
+from app_v1.helpers.embedding_cache import embedTexts
+from app_v1.helpers.artifact_format import ArtifactView, encodeArtifact
+from app_v1.helpers.resume_collection import addToUserCollection
+from app_v1.helpers.vector_index import chooseIndex
+from app_v1.helpers.resume_artifacts import findResumeArtifact, recordResumeArtifact, createDedupedIndexJob
+from app_v1.helpers.pdf_text import hashUpload, extractPdfText
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/v1/index_resume", tags=["index_resume"])
 
 EMBEDDER_ID = os.getenv("EMBEDDER_ID")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
-
-def _read_pdf(file: UploadFile) -> str:
-# Read the PDF file
-    text = ""
-    content = file.file.read()
-    reader = PdfReader(BytesIO(content))
-    number_of_pages = len(reader.pages)
-    for page in reader.pages:
-        text += page.extract_text()
-    return text
+PDF_PARSE_TIMEOUT = float(os.getenv("PDF_PARSE_TIMEOUT", "60"))
+JOB_ENQUEUE_TIMEOUT = float(os.getenv("JOB_ENQUEUE_TIMEOUT", "10"))
+RESUME_VECTOR_DTYPE = os.getenv("RESUME_VECTOR_DTYPE", "float32")
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "50"))
+
+# Bump whenever cleaning or chunking changes, so uploads indexed by older code are not reused.
+CHUNKER_VERSION = "1"
+
+def _fingerprint(file: UploadFile, max_bytes: int) -> str:
+    # Identifies an upload by its bytes and everything that shapes its index, the embedder and the chunker.
+    # The upload is streamed from its spooled file and rejected as soon as it exceeds max_bytes.
+    return hashUpload(file.file, max_bytes, f"\0{EMBEDDER_ID}\0{CHUNKER_VERSION}".encode("utf-8"))
+
+def _read_pdf(file: UploadFile, pdf_text_pool=None) -> str:
+# Read the PDF file straight from the spooled upload, large PDFs are split across the extraction processes
+    if pdf_text_pool is not None:
+        return pdf_text_pool.extract(file.file, MAX_PDF_PAGES)
+    return extractPdfText(file.file, MAX_PDF_PAGES)
+
+# A newline at least 10 characters after the previous newline (or the start) that doesn't start a blank line.
+# The newline is matched first so the engine only evaluates the lookbehind at newlines.
+_SEGMENT_BREAK = re.compile(r"\n(?<=[^\n]{10}\n)(?!\n)")
+_SPACE_RUN = re.compile(r" {2,}")
+_NEWLINE_RUN = re.compile(r"\s*\n\s*")
 
 def _mark_newlines(text: str) -> str:
-    if not text:
-        return ""
-
-    result = []
-    last_nl_pos = -1
-    for i, ch in enumerate(text):
-        if ch == "\n":
-            next_is_newline = (i + 1 < len(text) and text[i + 1] == "\n")
-            dist = i - last_nl_pos - 1
-            if dist >= 10 and not next_is_newline:
-                result.append("|")
-                last_nl_pos = i
-                continue
-            else:
-                result.append("\n")
-                last_nl_pos = i
-        else:
-            result.append(ch)
-    return "".join(result)
+# Replace segment-ending newlines with "|"
+    return _SEGMENT_BREAK.sub("|", text)
 
 def _clean_text(text: str) -> str:
-# Clean document text
+# Clean document text, every pass runs in C: plain replacements wherever a regex isn't needed
     text = (text
             .replace("\u2022", "- ")
             .replace("●", "- ")
-            .replace("•", "- ")
-            .replace("·", "- "))
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\s*\n\s*", "\n", text)
-    text = re.sub(r"-\s*\n\s*", "", text)
+            .replace("·", "- ")
+            .replace("\t", " "))
+    text = _SPACE_RUN.sub(" ", text)
+    text = _NEWLINE_RUN.sub("\n", text)
+    # Whitespace around line breaks is now a bare "\n", so a hyphenated line break is always "-\n".
+    text = text.replace("-\n", "")
     return text.strip()
 
 def _split_text(text: str) -> list:
@@ -112,95 +119,70 @@ def _overlap_chunks(chunks: list) -> list:
 
     return overlapping_chunks
 
-def _get_embeddings(overlapping_chunks: list, embedder) -> list:
-# Get embeddings for the chunks
-    return embedder.embeddings.create(
-        model=EMBEDDER_ID,
-        input=overlapping_chunks
-    )
-
-def _get_serialized_faiss(resp: list) -> faiss.Index:
-# Store embeddings in a FAISS index
-    vecs = np.array([item.embedding for item in resp.data], dtype="float32")
-    dim = vecs.shape[1]
+def _get_embeddings(overlapping_chunks: list, app: FastAPI) -> np.ndarray:
+# Get embeddings for the chunks, chunks embedded before (by any resume) come from the embedding cache
+    return embedTexts(app, overlapping_chunks, EMBEDDER_ID, "embed_chunks")
 
+def _build_artifact(vecs: np.ndarray, chunks: list, job_id: str) -> bytes:
+# Normalize the embeddings and pack them with their chunks into a single resume artifact,
+# recording the index a loader should build for this many chunks
     faiss.normalize_L2(vecs)
-    index = faiss.IndexFlatL2(dim)
-
-    index.add(vecs)
-
-    return faiss.serialize_index(index)
-
-def _pickle_faiss(faiss):
-    buffer = BytesIO()
-    pickle.dump(faiss, buffer)
-    buffer.seek(0)
-    return buffer
-
-def _compress_chunks(chunks, job_id):
-    bundle = {
-        "chunks": chunks,
-        "uuid": job_id
-    }
-
-    return gzip.compress(json.dumps(bundle).encode("utf-8"))
-
-def _upload_to_s3(s3, pickled_faiss, compressed_chunks, job_id):
-    s3.upload_fileobj(
-        pickled_faiss,
-        S3_BUCKET_NAME,
-        f"resumes/{job_id}.pkl"
-    )
+    kind, param = chooseIndex(len(vecs))
+    return encodeArtifact(job_id, vecs, chunks, RESUME_VECTOR_DTYPE, kind, param)
 
+def _upload_to_s3(s3, artifact, job_id):
     s3.put_object(
         Bucket=S3_BUCKET_NAME, 
-        Key=f"resumes/{job_id}.bin", 
-        Body=compressed_chunks,
-        ContentType="application/json", 
-        ContentEncoding="gzip"
+        Key=f"resumes/{job_id}.mart", 
+        Body=artifact,
+        ContentType="application/octet-stream"
     )
 
 def index_resume(
     text: str,
     job_id: str,
     user_id: str,
-    app: FastAPI
+    app: FastAPI,
+    lease: str
 ):
-    try:
-        createJob(app, job_id, user_id, "IndexResume", "Starting")
-
-        updateJobStatus(app, job_id, "Marking newlines in resume")
-        text = _mark_newlines(text)
+    # Runs on a job worker holding the job's lease, exceptions propagate so the worker can retry or fail the job.
+    reportJobStage(app, job_id, "Cleaning resume text")
+    text = _clean_text(_mark_newlines(text))
 
-        updateJobStatus(app, job_id, "Cleaning resume text")
-        text = _clean_text(text)
+    reportJobStage(app, job_id, "Splitting resume into chunks")
+    chunks = _split_text(text)
 
-        updateJobStatus(app, job_id, "Splitting resume into chunks")
-        chunks = _split_text(text)
+    reportJobStage(app, job_id, "Overlapping chunks")
+    overlapping_chunks = _overlap_chunks(chunks)
 
-        updateJobStatus(app, job_id, "Overlapping chunks")
-        overlapping_chunks = _overlap_chunks(chunks)
+    reportJobStage(app, job_id, "Getting embeddings for overlapped chunks")
+    vecs = _get_embeddings(overlapping_chunks, app)
 
-        updateJobStatus(app, job_id, "Getting embeddings for overlapped chunks")
-        resp = _get_embeddings(overlapping_chunks, app.state.embedder)
+    reportJobStage(app, job_id, "Building resume artifact")
+    artifact = _build_artifact(vecs, overlapping_chunks, job_id)
+    
+    reportJobStage(app, job_id, "Uploading to S3")
+    with app.state.metrics.time("mart_external_call_seconds", service="s3", operation="upload_resume"):
+        _upload_to_s3(app.state.s3, artifact, job_id)
 
-        updateJobStatus(app, job_id, "Getting serialized FAISS index")
-        index_data = _get_serialized_faiss(resp)
+    completeJob(app, job_id, lease)
 
-        updateJobStatus(app, job_id, "Pickling index")
-        pickled_faiss = _pickle_faiss(index_data)
+    try:
+        # The user's multi-resume collection, if this process holds it, gains the new resume in place.
+        addToUserCollection(app, user_id, job_id, ArtifactView(artifact))
+    except Exception as e:
+        logger.error(f"Failed to add resume {job_id} to the collection of user {user_id}: {e}")
+    return job_id
 
-        updateJobStatus(app, job_id, "Compressing overlapping chunks")
-        compressed_chunks = _compress_chunks(overlapping_chunks, job_id)
-        
-        updateJobStatus(app, job_id, "Uploading to S3")
-        _upload_to_s3(app.state.s3, pickled_faiss, compressed_chunks, job_id)
+def run_index_resume_job(app: FastAPI, job: dict):
+    # Job queue handler for IndexResume jobs.
+    payload = job["Payload"]
+    index_resume(payload["text"], job["JobID"], job["CreatedBy"], app, job["LockedBy"])
 
-        completeJob(app, job_id)
-        return job_id
-    except Exception as e:
-        job = getJob(app, job_id, user_id)
-        updateJobStatus(app, job_id, f"Job threw an Exception: {e} at {job['Status']}")
+    # Jobs queued before uploads were fingerprinted have no fingerprint to record.
+    if payload.get("fingerprint"):
+        recordResumeArtifact(app, job["CreatedBy"], payload["fingerprint"], job["JobID"])
+    return job["JobID"]
 
 @router.post(
     "/start",
@@ -210,13 +192,14 @@ Begin an asynchronous job to index an uploaded resume PDF and store the artifact
 
 **What it does**
 - Validates the uploaded file:
-  - Checks size against `get_subscription_limits()["max_resume_size"][user["subscription_level"]]`.
-  - Verifies the file starts with the PDF signature `%PDF-`.
-- Extracts text from the PDF and enqueues `index_resume` as a background task.
-- Background task cleans/segments text, creates overlapping chunks, generates embeddings, builds a FAISS index, and uploads:
-  - `resumes/{job_id}.pkl` — serialized FAISS index
-  - `resumes/{job_id}.bin` — gzip-compressed JSON bundle of chunks & metadata
-- Tracks progress in `app.state.index_jobs`.
+  - Checks its size against the subscription's `MaxFileUploadKB`, while streaming it rather than after reading it.
+  - Checks it parses as a PDF with at most `MAX_PDF_PAGES` pages, before extracting any text.
+- Fingerprints the upload by its content hash, embedder model and chunker version. If the user has already
+  indexed an identical upload, the new job completes immediately and its `job_id` refers to the existing artifacts.
+- Otherwise extracts text from the PDF and durably queues an `IndexResume` job in the `AIJobs` table.
+- A job worker cleans/segments text, creates overlapping chunks, generates embeddings, and uploads:
+  - `resumes/{job_id}.mart` — a single binary artifact holding the normalized chunk vectors and the chunks
+- Tracks progress in the `AIJobs` table, failed jobs are retried up to `JOB_MAX_ATTEMPTS` times.
 
 **Form data**
 - `file` *(UploadFile, required)* — The PDF resume to index.
@@ -227,15 +210,16 @@ Begin an asynchronous job to index an uploaded resume PDF and store the artifact
 
 **Responses**
 - `202 Accepted` — Returns `{"uuid": "<job-id>", "message": "Resume indexing job started in the background"}`.
-- `413 Payload Too Large` — If the file exceeds the allowed size for the user's subscription.
-- `400 Bad Request` — If the file is not a valid PDF (fails signature check).
+- `413 Payload Too Large` — If the file exceeds the allowed size for the user's subscription, or has too many pages.
+- `400 Bad Request` — If the file is not a valid PDF.
+- `503 Service Unavailable` — If the job couldn't be queued.
+- `504 Gateway Timeout` — If the PDF takes too long to parse.
 - `401 Unauthorized` — If authentication fails (from dependency).
 - `429 Too Many Requests` — If rate limiting is triggered (from dependency).
 """
 )
 async def start_resume_indexing_job(
     file: UploadFile,
-    background_tasks: BackgroundTasks,
     request: Request,
     user_data: dict = Depends(authenticateSessionAndRateLimit)
 ):
@@ -247,22 +231,60 @@ async def start_resume_indexing_job(
     #if not file.read(5) == b"%PDF-":
     #    raise HTTPException(status_code=400, detail="Not a valid PDF")
 
-    subscription = {}
+    # Resolved by authenticateSessionAndRateLimit, in a threadpool rather than on the event loop.
+    subscription = user_data['Subscription']
 
-    for attr in user_data['UserAttributes']:
-        if attr['Name'] == "custom:subscriptionLevel":
-            subscription = getSubscription(request.app, attr['Value'])
+    max_bytes = subscription['MaxFileUploadKB'] * 1024
 
-    if file.size > subscription['MaxFileUploadKB'] and subscription['MaxFileUploadKB'] > 0:
+    # The declared size is checked first, the streamed size is checked again while fingerprinting.
+    if file.size is not None and file.size > max_bytes and max_bytes > 0:
         raise HTTPException(status_code=413, detail="File too large")
 
     job_id = str(uuid.uuid4())
 
-    text = _read_pdf(file)
+    fingerprint = await runBlocking(
+        request.app, "cpu", PDF_PARSE_TIMEOUT, "Fingerprinting PDF",
+        _fingerprint, file, max_bytes
+    )
 
     for attr in user_data['UserAttributes']:
         if attr['Name'] == "sub":
-            background_tasks.add_task(index_resume, text, job_id, attr['Value'], request.app)
+            artifact_id = await runBlocking(
+                request.app, "io", JOB_ENQUEUE_TIMEOUT, "Looking up indexed resume",
+                findResumeArtifact, request.app, attr['Value'], fingerprint
+            )
+            if artifact_id is not None:
+                # Writes aren't abandoned, PostgreSQL rolls them back after JOB_ENQUEUE_TIMEOUT instead,
+                # so a job is never created behind a 504.
+                created = await runBlocking(
+                    request.app, "io", None, "Queueing job",
+                    createDedupedIndexJob, request.app, job_id, attr['Value'], artifact_id,
+                    statement_timeout=JOB_ENQUEUE_TIMEOUT
+                )
+                if not created:
+                    raise HTTPException(status_code=503, detail="Failed to queue resume indexing job")
+                return JSONResponse(
+                    {
+                        "uuid": job_id,
+                        "message": "Resume already indexed, reusing the existing index"
+                    },
+                    status_code=202
+                )
+
+            # Parsing runs on the CPU executor so large PDFs don't stall other requests on this worker.
+            text = await runBlocking(
+                request.app, "cpu", PDF_PARSE_TIMEOUT, "Reading PDF",
+                _read_pdf, file, request.app.state.pdf_text_pool
+            )
+
+            queued = await runBlocking(
+                request.app, "io", None, "Queueing job",
+                enqueueJob, request.app, job_id, attr['Value'], "IndexResume",
+                {"text": text, "fingerprint": fingerprint},
+                statement_timeout=JOB_ENQUEUE_TIMEOUT
+            )
+            if not queued:
+                raise HTTPException(status_code=503, detail="Failed to queue resume indexing job")
             return JSONResponse(
                 {
                     "uuid": job_id,
@@ -19,7 +19,7 @@ router = APIRouter(prefix="/v1/index_resume", tags=["index_resume"])
 Retrieve the current status of a resume indexing job.
 
 **What it does**
-- Looks up the job in `app.state.index_jobs` using the provided `job_id`.
+- Looks up the job in the `AIJobs` table using the provided `job_id`.
 - Returns the job's UUID along with its current status metadata.
 
 **Path parameters**
@@ -0,0 +1,38 @@
+"""
+This is the /v1/metrics endpoint route for scraping the API process's metrics.
+
+It contains the endpoint:
+- GET /v1/metrics: Returns pipeline histograms and pool/cache stats in the Prometheus text format.
+"""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from app_v1.helpers.metrics import renderMetrics
+
+router = APIRouter(prefix="/v1/metrics", tags=["metrics"])
+
+@router.get(
+    "",
+    summary="Scrape metrics",
+    response_class=PlainTextResponse,
+    description="""
+Expose this process's metrics for a Prometheus-compatible scraper.
+
+**What it does**
+- Renders histograms of per-stage pipeline wall time (`mart_job_stage_seconds`), queue wait
+  (`mart_job_queue_wait_seconds`), job end-to-end latency (`mart_job_duration_seconds`) and
+  embedder/Gemini/S3 call latency (`mart_external_call_seconds`).
+- Appends the PostgreSQL pool, resume cache, rate limiter and job status buffer stats as gauges.
+
+Pipeline histograms are only populated by processes that run jobs, standalone workers serve
+the same metrics on `METRICS_PORT`.
+
+**Responses**
+- `200 OK` — Metrics in the Prometheus text exposition format.
+"""
+)
+def scrape_metrics(request: Request):
+    return PlainTextResponse(
+        renderMetrics(request.app),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -5,7 +5,7 @@ It contains the endpoints:
 - POST /user/change_subscription: Changes the current user's subscriptionLevel 
 """
 
-from app_v1.helpers.cognito_auth import Authenticate, authenticateSession, createHash, verifyCognitoToken
+from app_v1.helpers.cognito_auth import Authenticate, authenticateSession, createHash, verifyCognitoToken, invalidateUserAttributes
 from app_v1.helpers.rate_limits import getValidSubscriptionLevels
 from fastapi import Request, APIRouter, Depends, HTTPException
 import os, logging, jwt
@@ -41,6 +41,7 @@ def cognito_change_subscription_level(
             ],
             AccessToken=user_data["AccessToken"]
         )
+        invalidateUserAttributes(request.app, user_data["AccessToken"])
         return response
     except Exception as e:
         logger.error(f"Error during authentication: {e}")
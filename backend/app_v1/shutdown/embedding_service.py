@@ -0,0 +1,15 @@
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def shutdownEmbeddingService(app):
+    try:
+        if getattr(app.state, "embedding_service", None) is not None:
+            app.state.embedding_service.shutdown()
+            logger.info("Embedding service shut down successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to shut down embedding service: {e}")
+        return False
@@ -0,0 +1,15 @@
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def shutdownExecutors(app):
+    try:
+        for name, executor in app.state.executors.items():
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info(f"Executor {name} shut down successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to shut down executors: {e}")
+        return False
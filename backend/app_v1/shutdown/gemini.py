@@ -0,0 +1,15 @@
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def shutdownGemini(app):
+    try:
+        if getattr(app.state, "gemini", None) is not None:
+            app.state.gemini.close()
+            logger.info("Gemini client closed successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to close Gemini client: {e}")
+        return False
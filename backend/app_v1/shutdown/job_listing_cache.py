@@ -0,0 +1,15 @@
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def shutdownJobListingCache(app):
+    try:
+        if getattr(app.state, "job_listing_cache", None) is not None:
+            app.state.job_listing_cache.close()
+            logger.info("Job listing cache closed successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to close job listing cache: {e}")
+        return False
@@ -0,0 +1,14 @@
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def shutdownJobStatus(app):
+    try:
+        app.state.job_status.stop()
+        logger.info("Job status buffer flushed and stopped successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to stop job status buffer: {e}")
+        return False
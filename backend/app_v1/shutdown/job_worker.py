@@ -0,0 +1,15 @@
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def shutdownJobWorker(app):
+    try:
+        if app.state.job_worker is not None:
+            app.state.job_worker.stop()
+            logger.info("Embedded job worker stopped successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to stop embedded job worker: {e}")
+        return False
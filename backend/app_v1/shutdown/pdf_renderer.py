@@ -0,0 +1,15 @@
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def shutdownPdfRenderer(app):
+    try:
+        if getattr(app.state, "pdf_renderer", None) is not None:
+            app.state.pdf_renderer.shutdown()
+            logger.info("PDF render pool shut down successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to shut down PDF render pool: {e}")
+        return False
@@ -0,0 +1,15 @@
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def shutdownPdfText(app):
+    try:
+        if getattr(app.state, "pdf_text_pool", None) is not None:
+            app.state.pdf_text_pool.shutdown()
+            logger.info("PDF text extraction pool shut down successfully.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to shut down PDF text extraction pool: {e}")
+        return False
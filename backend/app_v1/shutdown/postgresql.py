@@ -1,4 +1,5 @@
 import psycopg2, logging
+from app_v1.helpers.postgresql_pool import getPoolStats
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -6,10 +7,11 @@ logger = logging.getLogger(__name__)
 
 def shutdownPostgreSQL(app):
     try:
-        app.state.postgresql_db.close()
+        logger.info(f"PostgreSQL pool stats at shutdown: {getPoolStats(app)}")
+        app.state.postgresql_pool.closeall()
 
-        logger.info("PostgreSQL clossed successfully.")
+        logger.info("PostgreSQL pool closed successfully.")
         return True
     except Exception as e:
         logger.error(f"Failed to close PostgreSQL: {e}")
-        return False
\ No newline at end of file
+        return False
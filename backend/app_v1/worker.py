@@ -0,0 +1,105 @@
+"""
+This is the standalone job worker for the AI pipelines.
+
+It claims queued jobs from the AIJobs table and runs them, so API nodes and
+worker nodes can be scaled independently. Run it with:
+    python -m app_v1.worker
+"""
+
+import logging, os, signal, threading, types
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+def createJobWorker(app):
+    from app_v1.helpers.job_queue import JobWorker
+    from app_v1.routers.index_resume.start import run_index_resume_job
+    from app_v1.routers.generate_cover_letter.start import run_generate_cover_letter_job
+
+    return JobWorker(
+        app,
+        {
+            "IndexResume": run_index_resume_job,
+            "GenerateCoverletter": run_generate_cover_letter_job
+        },
+        WORKER_CONCURRENCY,
+        JOB_POLL_INTERVAL,
+        JOB_VISIBILITY_TIMEOUT
+    )
+
+def main():
+    logger.info("Starting worker...")
+
+    # Services are kept on a stand-in for FastAPI's app.state so the initialisers can be shared with the API.
+    app = types.SimpleNamespace(state=types.SimpleNamespace())
+
+    logger.info("Initialising services...")
+    from app_v1.initialisers.metrics import initialiseMetrics
+    from app_v1.initialisers.openai_client import initialiseOpenAI
+    from app_v1.initialisers.embedding_service import initialiseEmbeddingService
+    from app_v1.initialisers.s3 import initialiseS3
+    from app_v1.initialisers.gemini import initialiseGemini
+    from app_v1.initialisers.postgresql import initialisePostgreSQL
+    from app_v1.initialisers.resume_cache import initialiseResumeCache
+    from app_v1.initialisers.job_listing_extractor import initialiseJobListingExtractor
+    from app_v1.initialisers.pdf_renderer import initialisePdfRenderer
+    from app_v1.initialisers.job_status import initialiseJobStatus
+
+    for initialiser in [
+        initialiseMetrics,
+        initialiseOpenAI,
+        initialiseEmbeddingService,
+        initialiseS3,
+        initialiseGemini,
+        initialisePostgreSQL,
+        initialiseResumeCache,
+        initialiseJobListingExtractor,
+        initialisePdfRenderer,
+        initialiseJobStatus
+    ]:
+        if not initialiser(app):
+            raise Exception("Failed to initialize all services, check logs for details.")
+
+    # The worker has no API, its metrics are served on their own port.
+    from app_v1.helpers.metrics import startMetricsServer
+    metrics_server = startMetricsServer(app, METRICS_PORT)
+
+    worker = createJobWorker(app)
+    worker.start()
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    logger.info("Worker started.")
+    stopping.wait()
+
+    logger.info("Shutting down worker, waiting for running jobs...")
+    worker.stop()
+    metrics_server.shutdown()
+
+    from app_v1.shutdown.job_status import shutdownJobStatus
+    from app_v1.shutdown.embedding_service import shutdownEmbeddingService
+    from app_v1.shutdown.pdf_renderer import shutdownPdfRenderer
+    from app_v1.shutdown.gemini import shutdownGemini
+    from app_v1.shutdown.postgresql import shutdownPostgreSQL
+
+    for shutdown in [
+        shutdownJobStatus,
+        shutdownEmbeddingService,
+        shutdownPdfRenderer,
+        shutdownGemini,
+        shutdownPostgreSQL
+    ]:
+        if not shutdown(app):
+            raise Exception("Failed to shutdown all services, check logs for details.")
+
+    logger.info("Shutdown complete.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmarks the embedding service against a local stand-in embedder.
+
+The stand-in answers embeddings.create like the OpenAI client after a configurable
+fixed latency per request plus a latency per text, fails a configurable fraction of
+requests with a 503, and records how many requests it served and how many ran at once.
+Each embedding is derived from its text, so every result can be checked.
+
+Three runs are reported:
+- many concurrent jobs embedding a few texts each, calling the embedder directly as
+  embedTexts used to, one request per job and no retries
+- the same jobs through EmbeddingService, micro-batched across jobs
+- one job embedding a very large input through EmbeddingService, split into bounded batches
+
+Runs through the service fail unless no request held more than max_batch texts and
+no more than max_in_flight requests ran at once. A final check makes sure an error
+that isn't transient is raised without being retried.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_service [jobs] [texts_per_job] [latency_ms] [failure_rate]
+"""
+
+import sys, hashlib, random, threading, time, types
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from app_v1.helpers.embedding_service import EmbeddingService
+
+DIM = 384
+
+class _StubError(Exception):
+    status_code = 503
+
+class StubEmbedder:
+    def __init__(self, latency: float, per_text_latency: float, failure_rate: float, seed: int = 0):
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.failure_rate = failure_rate
+        self.embeddings = self
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.largest = 0
+        self.running = 0
+        self.peak = 0
+
+    def create(self, model: str, input: list):
+        with self._lock:
+            self.requests += 1
+            self.largest = max(self.largest, len(input))
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            fail = self._rng.random() < self.failure_rate
+        try:
+            time.sleep(self.latency + self.per_text_latency * len(input))
+            if fail:
+                raise _StubError("503 Service Unavailable")
+            return types.SimpleNamespace(data=[types.SimpleNamespace(embedding=expected(text)) for text in input])
+        finally:
+            with self._lock:
+                self.running -= 1
+
+def expected(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(DIM).astype("float32")
+
+def _job_texts(jobs: int, per_job: int) -> list:
+    return [[f"job {j} chunk {i}" for i in range(per_job)] for j in range(jobs)]
+
+def _check(texts: list, vecs: np.ndarray):
+    if not np.array_equal(vecs, np.stack([expected(text) for text in texts])):
+        raise SystemExit("Embeddings were returned out of order or for the wrong texts")
+
+def _run_jobs(name: str, embed, stub: StubEmbedder, job_texts: list):
+    failed = 0
+
+    def job(texts):
+        nonlocal failed
+        try:
+            _check(texts, embed(texts))
+        except SystemExit:
+            raise
+        except Exception:
+            failed += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(job_texts)) as pool:
+        list(pool.map(job, job_texts))
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:<28} {1000 * elapsed:8.1f}ms  {stub.requests:4} requests  largest {stub.largest:4} texts  "
+          f"peak {stub.peak:3} concurrent  {failed} of {len(job_texts)} jobs failed")
+
+def _check_limits(stub: StubEmbedder, service: EmbeddingService):
+    if stub.largest > service.max_batch:
+        raise SystemExit(f"A request held {stub.largest} texts, max_batch is {service.max_batch}")
+    if stub.peak > service.max_in_flight:
+        raise SystemExit(f"{stub.peak} requests ran at once, max_in_flight is {service.max_in_flight}")
+
+def _check_not_retried():
+    class BadInputEmbedder(StubEmbedder):
+        def create(self, model: str, input: list):
+            with self._lock:
+                self.requests += 1
+            raise TypeError("bad input")
+
+    stub = BadInputEmbedder(0, 0, 0)
+    service = EmbeddingService(stub, retry_base_delay=0.01)
+    try:
+        service.embed(["text"], "stub")
+        raise SystemExit("A failing embedder returned embeddings")
+    except TypeError:
+        pass
+    finally:
+        service.shutdown()
+    if stub.requests != 1:
+        raise SystemExit(f"A TypeError was retried, {stub.requests} requests were sent")
+    print("a non-transient error was raised without retrying")
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    per_job = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.05
+    failure_rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0.05
+    per_text_latency = 0.0005
+    job_texts = _job_texts(jobs, per_job)
+
+    stub = StubEmbedder(latency, per_text_latency, failure_rate)
+    def direct(texts):
+        resp = stub.embeddings.create(model="stub", input=texts)
+        return np.stack([np.array(item.embedding, dtype="float32") for item in resp.data])
+    _run_jobs("direct, one request per job", direct, stub, job_texts)
+
+    stub = StubEmbedder(latency, per_text_latency, failure_rate)
+    service = EmbeddingService(stub, max_batch=64, batch_window=0.01, max_in_flight=4, retry_base_delay=0.01)
+    _run_jobs("service, micro-batched", lambda texts: service.embed(texts, "stub"), stub, job_texts)
+    print(f"  service stats {service.stats()}")
+    service.shutdown()
+    _check_limits(stub, service)
+
+    stub = StubEmbedder(latency, per_text_latency, failure_rate)
+    service = EmbeddingService(stub, max_batch=64, batch_window=0.01, max_in_flight=4, retry_base_delay=0.01)
+    _run_jobs("service, one large input", lambda texts: service.embed(texts, "stub"), stub, _job_texts(1, 2000))
+    print(f"  service stats {service.stats()}")
+    service.shutdown()
+    _check_limits(stub, service)
+
+    _check_not_retried()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmarks the approximate vector indexes against exact search.
+
+Builds every index kind chooseIndex can pick over a set of normalized vectors,
+either the vectors of a .mart resume artifact or a synthetic clustered set
+(resume chunks are far from uniformly spread), and reports build time, mean
+query latency and recall@k against the exact IndexFlatIP ranking. Queries are
+perturbed copies of held-out vectors, like a job description close to a few chunks.
+
+Usage (from backend/):
+    python -m benchmarks.index_recall [artifact.mart | vector count] [k] [queries]
+"""
+
+import sys, time
+import numpy as np
+import faiss
+
+from app_v1.helpers.artifact_format import ArtifactView
+from app_v1.helpers import vector_index
+from app_v1.helpers.vector_index import chooseIndex, buildIndex
+
+def _synthetic(n: int, d: int = 768, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, d)).astype("float32")
+    x = centres[rng.integers(clusters, size=n)] + 0.5 * rng.standard_normal((n, d)).astype("float32")
+    faiss.normalize_L2(x)
+    return x
+
+def _queries(x: np.ndarray, n: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    q = x[rng.integers(len(x), size=n)] + 0.3 * rng.standard_normal((n, x.shape[1])).astype("float32")
+    faiss.normalize_L2(q)
+    return q
+
+def _recall(expected: np.ndarray, actual: np.ndarray) -> float:
+    hits = sum(len(set(e) & set(a[a >= 0])) for e, a in zip(expected, actual))
+    return hits / expected.size
+
+def _run(name: str, build, q: np.ndarray, k: int, expected: np.ndarray):
+    started = time.perf_counter()
+    index = build()
+    built = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for row in q:
+        index.search(row[None, :], k)
+    per_query = (time.perf_counter() - started) / len(q)
+
+    _, ids = index.search(q, k)
+    recall = _recall(expected, ids)
+    print(f"{name:<24} build {1000 * built:8.1f}ms  query {1000 * per_query:7.3f}ms  recall@{k} {recall:.3f}")
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "20000"
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    n_queries = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    if source.endswith(".mart"):
+        with open(source, "rb") as f:
+            x = np.array(ArtifactView(f.read()).vectors, dtype="float32")
+    else:
+        x = _synthetic(int(source))
+    q = _queries(x, n_queries)
+    print(f"{len(x)} vectors of dimension {x.shape[1]}, {n_queries} queries, auto picks {chooseIndex(len(x), 'auto')}")
+
+    exact = buildIndex(x, "flat")
+    _, expected = exact.search(q, k)
+    _run("flat (exact)", lambda: buildIndex(x, "flat"), q, k, expected)
+
+    _, m = chooseIndex(len(x), "hnsw")
+    for ef in (16, 32, 64, 128):
+        vector_index.HNSW_EF_SEARCH = ef
+        _run(f"hnsw M={m} efSearch={ef}", lambda: buildIndex(x, "hnsw", m), q, k, expected)
+
+    kind, nlist = chooseIndex(len(x), "ivf")
+    if kind != "ivf":
+        print(f"ivf skipped, {len(x)} vectors are too few to train it")
+        return
+    for nprobe in (4, 8, 16, 32):
+        vector_index.IVF_NPROBE = nprobe
+        _run(f"ivf nlist={nlist} nprobe={nprobe}", lambda: buildIndex(x, "ivf", nlist), q, k, expected)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmarks job listing field extraction.
+
+Compares the original extraction (selectors re-read from disk, the whole page parsed
+by BeautifulSoup's html.parser and select_one per selector) with JobListingExtractor
+(selectors compiled once, lxml's parser, compiled XPath). Every fixture must give
+identical fields with both, then the median time and the peak Python heap allocated
+per extraction (tracemalloc, lxml's C-allocated tree is not counted) are reported.
+Finally hot reload is checked by rewriting a copy of the selectors file.
+
+Fixtures are saved listing pages (e.g. "Save page as" on a LinkedIn job listing), with
+none given a synthetic page shaped like LinkedIn's guest job view is used.
+
+Usage (from backend/):
+    python -m benchmarks.job_listing_extraction [listing.html ...] [--runs N]
+"""
+
+import sys, json, os, shutil, tempfile, time, tracemalloc
+from bs4 import BeautifulSoup
+
+from app_v1.helpers.job_listing_extractor import JobListingExtractor
+
+SELECTORS_PATH = os.getenv("JOB_LISTING_SELECTORS_PATH", "../resources/job-listing-selectors.json")
+
+def _legacy_load_selectors():
+    with open(SELECTORS_PATH, "r") as f:
+        selectors = json.load(f)
+        if selectors:
+            return selectors
+    raise Exception("Failed to load job listing selectors")
+
+def _legacy_extract(job_listing_text: str):
+    soup = BeautifulSoup(job_listing_text, "html.parser")
+    result = {}
+    for key, selector_list in _legacy_load_selectors().items():
+        value = None
+        for selector in selector_list:
+            el = soup.select_one(selector)
+            if el and el.get_text(strip=True):
+                value = el.get_text(strip=True)
+                break
+        result[key] = value
+    return result
+
+def _synthetic_listing() -> str:
+    nav = "".join(f'<li class="nav__item"><a href="/jobs/{i}" data-tracking="nav-{i}">Link {i}</a></li>' for i in range(300))
+    related = "".join(
+        f'<li class="similar-jobs__item"><div class="base-card"><h3 class="base-search-card__title">Engineer {i}</h3>'
+        f'<h4 class="base-search-card__subtitle">Company {i}</h4><span class="job-search-card__location">City {i}</span></div></li>'
+        for i in range(200)
+    )
+    description = "".join(
+        f"<p><strong>Section {i}</strong></p><ul>" + "".join(f"<li>Responsibility {i}.{j} with <em>detail</em></li>" for j in range(8)) + "</ul>"
+        for i in range(30)
+    )
+    script = "<script>window.__data = " + json.dumps({"k": ["x" * 40] * 2000}) + ";</script>"
+    return f"""<!DOCTYPE html><html><head><title>Senior Engineer | Example Corp</title>{script}
+<style>.a{{color:red}}</style></head><body>
+<header><ul class="nav">{nav}</ul></header>
+<section class="sub-nav-cta"><span class="sub-nav-cta__meta-text">Melbourne, Victoria, Australia</span></section>
+<main><div class="show-more-less-html__markup show-more-less-html__markup--clamp-after-5">
+<!-- description --> {description}</div></main>
+<div class="sign-up-modal"><p class="sign-up-modal__sub-header">Sign in to apply for <strong>Senior Engineer</strong> at <strong>Example Corp</strong></p></div>
+<aside><ul class="similar-jobs">{related}</ul></aside>
+</body></html>"""
+
+def _measure(fn, html: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(html)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sorted(timings)[len(timings) // 2], peak
+
+def _check_hot_reload():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "selectors.json")
+        shutil.copy(SELECTORS_PATH, path)
+        extractor = JobListingExtractor(path, check_interval=0)
+        with open(path, "w") as f:
+            json.dump({"title": ["head > title"]}, f)
+        # Filesystems with coarse timestamps need the modification time moved explicitly.
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+        fields = extractor.extract(_synthetic_listing())
+        if fields != {"title": "Senior Engineer | Example Corp"} or extractor.reloads != 1:
+            raise SystemExit(f"Selectors were not reloaded: {fields}")
+        with open(path, "w") as f:
+            f.write("{not json")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 2_000_000_000))
+        if extractor.extract(_synthetic_listing()) != fields:
+            raise SystemExit("A broken selectors file replaced the working selectors")
+        print("hot reload: picked up a changed file, kept the previous selectors for a broken one")
+    finally:
+        shutil.rmtree(tmp)
+
+def main():
+    args = sys.argv[1:]
+    runs = 20
+    if "--runs" in args:
+        i = args.index("--runs")
+        runs = int(args[i + 1])
+        del args[i:i + 2]
+
+    fixtures = [(path, open(path, "r", encoding="utf-8", errors="replace").read()) for path in args]
+    if not fixtures:
+        fixtures = [("synthetic LinkedIn listing", _synthetic_listing())]
+
+    extractor = JobListingExtractor(SELECTORS_PATH)
+    for name, html in fixtures:
+        legacy_fields, fields = _legacy_extract(html), extractor.extract(html)
+        if legacy_fields != fields:
+            raise SystemExit(f"{name}: fields differ\n  legacy:    {legacy_fields}\n  extractor: {fields}")
+
+        legacy_time, legacy_peak = _measure(_legacy_extract, html, runs)
+        current_time, current_peak = _measure(extractor.extract, html, runs)
+        print(f"{name}: {len(html) // 1024} KiB, fields identical")
+        print(f"  bs4 html.parser   median {1000 * legacy_time:7.2f}ms  peak heap {legacy_peak // 1024:6} KiB")
+        print(f"  lxml + compiled   median {1000 * current_time:7.2f}ms  peak heap {current_peak // 1024:6} KiB  "
+              f"({legacy_time / current_time:.1f}x)")
+
+    _check_hot_reload()
+
+if __name__ == "__main__":
+    main()
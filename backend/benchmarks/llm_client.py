@@ -0,0 +1,203 @@
+"""
+Benchmarks the shared LLM client against a local fake Gemini server.
+
+The fake server answers generateContent-shaped POSTs after a configurable latency
+and fails a configurable fraction of them with 503 or 429 (with Retry-After: 0), or
+answers a scripted sequence of statuses. It counts the TCP connections it accepted,
+the requests it served and the most it handled at once.
+
+Three runs of the same number of calls from many threads are reported:
+- requests.post per call, as _get_gemini_response used to, no session and no retries
+- LLMClient.post, one pooled keep-alive session with retries and a concurrency limit
+- LLMClient.apost from asyncio, gathered on the event loop
+
+The LLMClient runs fail unless they stayed within max_concurrency requests at once
+and max_concurrency connections. Scripted checks follow: 429 and 503 responses are
+retried until one succeeds, waiting at least their Retry-After; a 400 is raised
+without a retry; and apost returns the same response as post.
+
+Usage (from backend/):
+    python -m benchmarks.llm_client [calls] [threads] [latency_ms] [failure_rate] [max_concurrency]
+"""
+
+import sys, asyncio, json, random, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+from app_v1.helpers.llm_client import LLMClient
+from app_v1.helpers.metrics import MetricsRegistry
+
+_RESPONSE = json.dumps({"candidates": [{"content": {"parts": [{"text": "[{\"letterbody\": \"...\"}]"}]}}]}).encode("utf-8")
+
+class FakeGemini:
+    def __init__(self, latency: float, failure_rate: float):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+        # Statuses answered, in order, before falling back to failure_rate, and the Retry-After sent with failures.
+        self.script = deque()
+        self.retry_after = 0
+        self.reset()
+
+        fake = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._lock:
+                    fake.requests.append(time.monotonic())
+                    fake.running += 1
+                    fake.peak = max(fake.peak, fake.running)
+                    roll = fake._rng.random()
+                    scripted = fake.script.popleft() if fake.script else None
+                try:
+                    time.sleep(fake.latency)
+                finally:
+                    with fake._lock:
+                        fake.running -= 1
+
+                status, body = 200, _RESPONSE
+                if scripted is not None:
+                    status = scripted
+                elif roll < fake.failure_rate:
+                    status = 503 if roll < fake.failure_rate / 2 else 429
+                if status != 200:
+                    body = b"{}"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status in (429, 503):
+                    self.send_header("Retry-After", str(fake.retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1beta/models/fake:generateContent"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self.requests = []
+            self.connections = 0
+            self.running = 0
+            self.peak = 0
+
+def _report(name: str, fake: FakeGemini, elapsed: float, calls: int, failed: int):
+    print(f"{name:<26} {1000 * elapsed:8.1f}ms  {fake.connections:4} connections  "
+          f"peak {fake.peak:3} concurrent  {failed} of {calls} calls failed")
+
+def _check(condition: bool, message: str):
+    if not condition:
+        raise SystemExit(f"FAILED: {message}")
+    print(f"ok: {message}")
+
+def _check_limits(fake: FakeGemini, client: LLMClient):
+    _check(fake.peak <= client.max_concurrency, f"peak {fake.peak} concurrent requests within max_concurrency {client.max_concurrency}")
+    _check(fake.connections <= client.max_concurrency, f"{fake.connections} new connections for {len(fake.requests)} requests, at most max_concurrency")
+
+def _check_retries(fake: FakeGemini, client: LLMClient, payload: dict):
+    fake.reset()
+    fake.retry_after = 0.2
+    fake.script.extend([429, 503, 200])
+    response = client.post(payload, "generate_content")
+    gaps = [b - a for a, b in zip(fake.requests, fake.requests[1:])]
+    _check(response.status_code == 200 and len(fake.requests) == 3, "429 and 503 are retried until a request succeeds")
+    _check(all(gap >= fake.retry_after for gap in gaps), f"Retry-After {fake.retry_after}s is honoured (gaps {[round(g, 3) for g in gaps]})")
+    fake.retry_after = 0
+
+    fake.reset()
+    fake.script.append(400)
+    try:
+        client.post(payload, "generate_content")
+        raised = None
+    except requests.HTTPError as e:
+        raised = e.response.status_code
+    _check(raised == 400 and len(fake.requests) == 1, "a 400 is raised without a retry")
+
+def _check_apost(client: LLMClient, payload: dict):
+    async def both():
+        return await client.apost(payload, "generate_content")
+    posted = client.post(payload, "generate_content")
+    aposted = asyncio.run(both())
+    _check(
+        (aposted.status_code, aposted.json()) == (posted.status_code, posted.json()),
+        "apost returns the same response as post"
+    )
+
+def _run_threads(name: str, call, fake: FakeGemini, calls: int, threads: int):
+    fake.reset()
+    failed = 0
+
+    def one(_):
+        nonlocal failed
+        try:
+            call()
+        except Exception:
+            failed += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(calls)))
+    _report(name, fake, time.perf_counter() - started, calls, failed)
+
+async def _run_async(client: LLMClient, fake: FakeGemini, calls: int, threads: int):
+    fake.reset()
+    payload = {"contents": [{"parts": [{"text": "Hi"}]}]}
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(client.apost(payload, "generate_content", executor) for _ in range(calls)),
+            return_exceptions=True
+        )
+        elapsed = time.perf_counter() - started
+    _report("LLMClient.apost", fake, elapsed, calls, sum(isinstance(r, Exception) for r in results))
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.02
+    failure_rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+    max_concurrency = int(sys.argv[5]) if len(sys.argv) > 5 else 8
+
+    fake = FakeGemini(latency, failure_rate)
+    payload = {"contents": [{"parts": [{"text": "Hi"}]}]}
+    headers = {"Content-Type": "application/json", "X-goog-api-key": "fake"}
+
+    def plain():
+        response = requests.post(fake.url, headers=headers, json=payload)
+        response.raise_for_status()
+    _run_threads("requests.post per call", plain, fake, calls, threads)
+
+    metrics = MetricsRegistry()
+    client = LLMClient(
+        fake.url, headers, "gemini",
+        max_concurrency=max_concurrency, retry_base_delay=0.01, metrics=metrics
+    )
+    _run_threads("LLMClient.post", lambda: client.post(payload, "generate_content"), fake, calls, threads)
+    _check_limits(fake, client)
+    asyncio.run(_run_async(client, fake, calls, threads))
+    _check_limits(fake, client)
+    print(f"  client stats {client.stats()}")
+
+    fake.failure_rate = 0
+    _check_retries(fake, client, payload)
+    _check_apost(client, payload)
+
+    client.close()
+    fake.server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmarks long job-description queries in cover-letter retrieval.
+
+Compares the legacy query embedding (the old character-window loop, which sent one
+request per window but only used the first vector) against the token-window embedding
+with mean and max pooling, reporting recall@k and latency for each.
+
+There is no labelled relevance data, so the reference ranking is the exhaustive one:
+every chunk scored by its best cosine similarity to any window of the description.
+
+Usage (from backend/, with EMBEDDER_URL and EMBEDDER_ID set):
+    python -m benchmarks.long_query_retrieval <resume.pdf> <job_description.txt> [k] [runs]
+"""
+
+import sys, os, time, types
+import numpy as np
+import faiss, openai
+from pypdf import PdfReader
+
+from app_v1.routers.index_resume.start import _mark_newlines, _clean_text, _split_text, _overlap_chunks
+from app_v1.routers.generate_cover_letter.start import _embed_queries, _query_windows
+from app_v1.helpers.metrics import MetricsRegistry
+from app_v1.helpers.embedding_service import EmbeddingService
+
+EMBEDDER_URL = os.getenv("EMBEDDER_URL")
+EMBEDDER_ID = os.getenv("EMBEDDER_ID")
+
+def _embed(app, texts):
+    resp = app.state.embedder.embeddings.create(model=EMBEDDER_ID.lower(), input=texts)
+    vecs = np.array([item.embedding for item in resp.data], dtype="float32")
+    faiss.normalize_L2(vecs)
+    return vecs
+
+def _legacy_query_vector(app, query):
+    # The query embedding _retrieve used before windows were batched and pooled.
+    vecs = []
+    batch_index = 0
+    while batch_index < len(query):
+        batch = query[batch_index:min(batch_index + 1050, len(query) - batch_index)]
+        vecs.extend(app.state.embedder.embeddings.create(
+            model=EMBEDDER_ID.lower(),
+            input=batch
+        ).data)
+        batch_index += 950
+
+    q = np.array([vecs[0].embedding], dtype="float32")
+    faiss.normalize_L2(q)
+    return q
+
+def _top_k(index, q, k):
+    _, ids = index.search(q, k)
+    return set(int(i) for i in ids[0] if i >= 0)
+
+def main():
+    if len(sys.argv) < 3:
+        raise SystemExit(__doc__)
+
+    resume_path, description_path = sys.argv[1], sys.argv[2]
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    runs = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+
+    embedder = openai.OpenAI(base_url=f"{EMBEDDER_URL}/v1/", api_key="docker")
+    app = types.SimpleNamespace(state=types.SimpleNamespace(
+        embedder=embedder,
+        embedding_service=EmbeddingService(embedder),
+        metrics=MetricsRegistry()
+    ))
+
+    text = "".join(page.extract_text() for page in PdfReader(resume_path).pages)
+    chunks = _overlap_chunks(_split_text(_clean_text(_mark_newlines(text))))
+    chunk_vecs = _embed(app, chunks)
+    index = faiss.IndexFlatL2(chunk_vecs.shape[1])
+    index.add(chunk_vecs)
+    k = min(k, index.ntotal)
+
+    with open(description_path, "r") as f:
+        description = f.read()
+
+    windows = _query_windows(description)
+    window_vecs = _embed(app, windows)
+    reference = set(np.argsort(-(chunk_vecs @ window_vecs.T).max(axis=1))[:k].tolist())
+    print(f"{len(chunks)} chunks, description of {len(description)} chars in {len(windows)} windows, k={k}")
+
+    modes = {
+        "legacy character windows": lambda: _legacy_query_vector(app, description),
+        "windows + mean pooling": lambda: _embed_queries(app, [description], "mean"),
+        "windows + max pooling": lambda: _embed_queries(app, [description], "max"),
+    }
+
+    for name, embed_query in modes.items():
+        latencies = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            q = embed_query()
+            found = _top_k(index, q, k)
+            latencies.append(time.perf_counter() - started)
+        recall = len(found & reference) / k
+        print(f"{name:28s} recall@{k}={recall:.2f}  median latency={1000 * sorted(latencies)[len(latencies) // 2]:.1f}ms")
+
+if __name__ == "__main__":
+    main()
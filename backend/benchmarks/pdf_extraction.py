@@ -0,0 +1,45 @@
+"""
+Benchmarks PDF text extraction.
+
+Times serial page-by-page extraction against the process pool splitting page
+ranges across workers, for each worker count given, and checks both produce
+the same text.
+
+Usage (from backend/):
+    python -m benchmarks.pdf_extraction [resume.pdf] [runs] [workers,...]
+"""
+
+import sys, os, time
+
+from app_v1.helpers.pdf_text import PdfTextPool, extractPdfText
+
+def _median_seconds(fn, runs: int):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, sorted(timings)[len(timings) // 2]
+
+def main():
+    resume_path = sys.argv[1] if len(sys.argv) > 1 else "../stress_resume.pdf"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    worker_counts = [int(n) for n in sys.argv[3].split(",")] if len(sys.argv) > 3 else [2, 4, os.cpu_count() or 2]
+
+    with open(resume_path, "rb") as f:
+        expected, serial = _median_seconds(lambda: extractPdfText(f, 10_000), runs)
+    print(f"serial          median {1000 * serial:.0f}ms ({len(expected)} characters)")
+
+    for workers in worker_counts:
+        pool = PdfTextPool(workers, min_pages=1, pages_per_range=1)
+        try:
+            with open(resume_path, "rb") as f:
+                text, parallel = _median_seconds(lambda: pool.extract(f, 10_000), runs)
+        finally:
+            pool.shutdown()
+        if text != expected:
+            raise SystemExit(f"Parallel extraction with {workers} workers produced different text")
+        print(f"{workers:2d} workers      median {1000 * parallel:.0f}ms ({serial / parallel:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmarks resume text cleanup.
+
+Checks the compiled-regex _mark_newlines + _clean_text against the original
+per-character loop and multi-pass cleaner, first on randomly generated text
+(a property check, every case must produce identical output) and then on the
+given resume, and reports the median time of each on that resume.
+
+Usage (from backend/):
+    python -m benchmarks.text_cleanup [resume.pdf] [runs] [cases]
+"""
+
+import sys, re, random, time
+from pypdf import PdfReader
+
+from app_v1.routers.index_resume.start import _mark_newlines, _clean_text
+
+def _legacy_mark_newlines(text: str) -> str:
+    if not text:
+        return ""
+
+    result = []
+    last_nl_pos = -1
+    for i, ch in enumerate(text):
+        if ch == "\n":
+            next_is_newline = (i + 1 < len(text) and text[i + 1] == "\n")
+            dist = i - last_nl_pos - 1
+            if dist >= 10 and not next_is_newline:
+                result.append("|")
+                last_nl_pos = i
+                continue
+            else:
+                result.append("\n")
+                last_nl_pos = i
+        else:
+            result.append(ch)
+    return "".join(result)
+
+def _legacy_clean_text(text: str) -> str:
+    text = (text
+            .replace("\u2022", "- ")
+            .replace("●", "- ")
+            .replace("•", "- ")
+            .replace("·", "- "))
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\s*\n\s*", "\n", text)
+    text = re.sub(r"-\s*\n\s*", "", text)
+    return text.strip()
+
+# Characters that exercise every branch: segment lengths, blank lines, hyphenation, bullets and odd whitespace.
+_ALPHABET = ["a", "B", "0", ".", "-", "-", "|", " ", " ", " ", "\t", "\n", "\n", "\n", "\r", "\f", "\xa0", " ",
+             "•", "●", "·", "word" * 3]
+
+def _legacy(text: str) -> str:
+    return _legacy_clean_text(_legacy_mark_newlines(text))
+
+def _current(text: str) -> str:
+    return _clean_text(_mark_newlines(text))
+
+def _check_equivalence(cases: int):
+    rng = random.Random(0)
+    for _ in range(cases):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 60)))
+        expected, actual = _legacy(text), _current(text)
+        if expected != actual:
+            raise SystemExit(f"Mismatch for {text!r}:\n  legacy:  {expected!r}\n  current: {actual!r}")
+    print(f"{cases} random cases identical")
+
+def _median_seconds(fn, text: str, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+def main():
+    resume_path = sys.argv[1] if len(sys.argv) > 1 else "../stress_resume.pdf"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    cases = int(sys.argv[3]) if len(sys.argv) > 3 else 100000
+
+    _check_equivalence(cases)
+
+    text = "".join(page.extract_text() for page in PdfReader(resume_path).pages)
+    if _legacy(text) != _current(text):
+        raise SystemExit(f"Output differs on {resume_path}")
+    print(f"{resume_path}: {len(text)} characters, output identical")
+
+    legacy = _median_seconds(_legacy, text, runs)
+    current = _median_seconds(_current, text, runs)
+    print(f"legacy loop + multi-pass   median {1000 * legacy:.1f}ms")
+    print(f"compiled regex             median {1000 * current:.1f}ms  ({legacy / current:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Checks and benchmarks local Cognito access token verification.
+
+Tokens are signed with locally generated RSA keys and the JWKS cache reads the key
+set from a file:// URL standing in for the user pool's endpoint. The checks cover
+a valid token, an expired token, the wrong client_id and token_use, a token signed
+with a rotated-in key (an unknown kid triggers a refetch), the unknown-kid refetch
+throttle, a single refetch when the TTL expires under concurrent requests, and the
+cached keys being kept when a refetch fails. The median verification time is then
+reported.
+
+Usage (from backend/):
+    python -m benchmarks.token_verification [runs]
+"""
+
+import sys, json, os, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+
+ISSUER = "https://cognito-idp.local.test/pool"
+CLIENT_ID = "local-client"
+os.environ["COGNITO_ISSUER"] = ISSUER
+os.environ["COGNITO_CLIENT_ID"] = CLIENT_ID
+
+import jwt
+from jwt.algorithms import RSAAlgorithm
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+
+from app_v1.helpers.cognito_auth import verifyCognitoTokenLocally
+from app_v1.helpers.jwks_cache import JWKSCache
+
+class CountingJWKSCache(JWKSCache):
+    # Counts key set fetches, each taking `delay` seconds like a network round trip.
+    def __init__(self, *args, delay: float = 0.05):
+        super().__init__(*args)
+        self.delay = delay
+        self.fetches = 0
+
+    def _fetch(self):
+        self.fetches += 1
+        time.sleep(self.delay)
+        return super()._fetch()
+
+def _key(kid: str):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return private_key, jwk
+
+def _write_jwks(path: str, jwks):
+    with open(path, "w") as f:
+        f.write(jwks if isinstance(jwks, str) else json.dumps({"keys": jwks}))
+
+def _token(private_key, kid: str, **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": "00000000-0000-0000-0000-000000000000",
+        "iss": ISSUER,
+        "iat": now,
+        "exp": now + 3600,
+        "token_use": "access",
+        "client_id": CLIENT_ID
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+def _rejected(jwks, token: str) -> bool:
+    try:
+        verifyCognitoTokenLocally(jwks, token)
+    except HTTPException as e:
+        return e.status_code == 401
+    return False
+
+def _check(condition: bool, message: str):
+    if not condition:
+        raise SystemExit(f"FAILED: {message}")
+    print(f"ok: {message}")
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "jwks.json")
+    try:
+        old_key, old_jwk = _key("old")
+        new_key, new_jwk = _key("new")
+        _write_jwks(path, [old_jwk])
+
+        jwks = CountingJWKSCache(f"file://{path}", 3600, 0.5)
+        jwks.refresh()
+
+        valid = _token(old_key, "old")
+        _check(verifyCognitoTokenLocally(jwks, valid)["client_id"] == CLIENT_ID, "a valid token is accepted")
+        _check(_rejected(jwks, _token(old_key, "old", iat=int(time.time()) - 7200, exp=int(time.time()) - 3600)), "an expired token is rejected")
+        _check(_rejected(jwks, _token(old_key, "old", client_id="another-client")), "a token for another app client is rejected")
+        _check(_rejected(jwks, _token(old_key, "old", token_use="id")), "an id token is rejected")
+        _check(_rejected(jwks, _token(new_key, "old")), "a token signed with the wrong key is rejected")
+
+        # Key rotation: the pool publishes a new key, tokens signed with it name an unknown kid.
+        _write_jwks(path, [old_jwk, new_jwk])
+        time.sleep(jwks.min_refresh_interval + 0.05)
+        fetches = jwks.fetches
+        _check(verifyCognitoTokenLocally(jwks, _token(new_key, "new"))["sub"] is not None, "a token signed with a rotated-in key is accepted")
+        _check(jwks.fetches == fetches + 1, "the rotated-in key was fetched once")
+
+        forged_key, _ = _key("forged")
+        fetches = jwks.fetches
+        forged = [_token(forged_key, f"forged-{i}") for i in range(50)]
+        _check(all(_rejected(jwks, token) for token in forged), "tokens with unknown kids are rejected")
+        _check(jwks.fetches == fetches, "unknown kids within min_refresh_interval don't refetch the key set")
+
+        # TTL expiry under concurrent requests: one thread refetches, the others use its result.
+        jwks.ttl = 0.2
+        time.sleep(jwks.ttl + 0.05)
+        fetches = jwks.fetches
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(lambda _: verifyCognitoTokenLocally(jwks, valid), range(64)))
+        _check(len(results) == 64, "concurrent requests are accepted while the key set expires")
+        _check(jwks.fetches == fetches + 1, f"the expired key set was fetched {jwks.fetches - fetches} time(s) by 64 concurrent requests, expected once")
+
+        # A failed refetch keeps the cached keys and isn't retried until min_refresh_interval has passed.
+        _write_jwks(path, "{not json")
+        time.sleep(jwks.ttl + 0.05)
+        fetches = jwks.fetches
+        _check(all(verifyCognitoTokenLocally(jwks, valid) for _ in range(20)), "cached keys are served when a refetch fails")
+        _check(jwks.fetches == fetches + 1, "a failed refetch isn't retried by every request")
+        _write_jwks(path, [new_jwk])
+        time.sleep(max(jwks.ttl, jwks.min_refresh_interval) + 0.05)
+        verifyCognitoTokenLocally(jwks, _token(new_key, "new"))
+        _check(_rejected(jwks, valid), "the key set is refetched once the endpoint recovers, dropping the retired key")
+
+        jwks.ttl = 3600
+        token = _token(new_key, "new")
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            verifyCognitoTokenLocally(jwks, token)
+            timings.append(time.perf_counter() - started)
+        print(f"local verification median {1e6 * sorted(timings)[len(timings) // 2]:.0f}us over {runs} runs")
+    finally:
+        os.remove(path)
+        os.rmdir(tmp)
+
+if __name__ == "__main__":
+    main()